@@ -0,0 +1,132 @@
+import csv
+import logging
+import os
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATASET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'airports.csv')
+
+
+def normalize(term):
+    return ' '.join((term or '').upper().split())
+
+
+class AirportIndex:
+    """Prefix index over airports and their cities.
+
+    Every searchable key (IATA code, airport name and its words, city name and
+    its words) is kept in one sorted list, so a prefix lookup is a binary
+    search followed by a scan over the matching run. Matches are ranked by
+    passenger volume, with exact IATA code matches first.
+    """
+
+    def __init__(self, rows):
+        # Each entry is (label, iata_code, weight); labels use the same
+        # "IATA, NAME" format as the Amadeus based autocomplete
+        self.entries = []
+        cities = {}
+        pairs = []
+
+        for row in rows:
+            code = normalize(row['iata'])
+            name = normalize(row['name'])
+            city_code = normalize(row['city_code'])
+            city = normalize(row['city'])
+            weight = float(row.get('passengers') or 0)
+            if not code or not name:
+                continue
+
+            entry_id = len(self.entries)
+            self.entries.append((f'{code}, {name}', code, weight))
+            for key in self._keys_for(code, name, city):
+                pairs.append((key, entry_id))
+
+            if city_code and city:
+                # A city ranks as large as all of its airports together
+                cities.setdefault((city_code, city), []).append(weight)
+
+        for (city_code, city), weights in cities.items():
+            entry_id = len(self.entries)
+            self.entries.append((f'{city_code}, {city}', city_code, sum(weights)))
+            for key in self._keys_for(city_code, city):
+                pairs.append((key, entry_id))
+
+        pairs.sort()
+        self._codes = {code for _, code, _ in self.entries}
+        self._keys = [key for key, _ in pairs]
+        self._ids = [entry_id for _, entry_id in pairs]
+
+    @staticmethod
+    def _keys_for(code, *names):
+        keys = {code}
+        for name in names:
+            if name:
+                keys.add(name)
+                keys.update(name.split())
+        return keys
+
+    @classmethod
+    def from_csv(cls, path):
+        with open(path, newline='', encoding='utf-8') as f:
+            return cls(csv.DictReader(f))
+
+    def search(self, term, limit=10):
+        prefix = normalize(term)
+        if not prefix:
+            return []
+
+        matches = set()
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            matches.add(self._ids[i])
+            i += 1
+
+        ranked = sorted(
+            (self.entries[entry_id] for entry_id in matches),
+            key=lambda entry: (entry[1] != prefix, -entry[2], entry[0]),
+        )
+        # An airport and its city can share a label (BNE, BRISBANE)
+        return list(dict.fromkeys(label for label, _, _ in ranked))[:limit]
+
+    def has_code(self, term):
+        return normalize(term) in self._codes
+
+    def __len__(self):
+        return len(self.entries)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_airport_index():
+    # Loaded once per process on first use
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                path = getattr(settings, 'AIRPORT_DATASET_PATH', DEFAULT_DATASET)
+                try:
+                    _index = AirportIndex.from_csv(path)
+                except (OSError, csv.Error, KeyError, ValueError) as error:
+                    logger.error(f"Failed to load airport dataset {path}: {error}")
+                    _index = AirportIndex([])
+    return _index
+
+
+def local_locations(term):
+    """Local matches for ``term`` and whether they are a complete answer.
+
+    The dataset only covers the larger airports, so a prefix hit alone does
+    not mean Amadeus has nothing more to offer ('SAN' should still find San
+    Diego). The local answer stands on its own only when the term is a known
+    IATA code or the matches already fill the autocomplete list.
+    """
+    index = get_airport_index()
+    limit = getattr(settings, 'AIRPORT_AUTOCOMPLETE_LIMIT', 10)
+    matches = index.search(term, limit=limit)
+    return matches, bool(matches) and (index.has_code(term) or len(matches) >= limit)
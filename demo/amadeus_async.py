@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import weakref
+from http.client import HTTPMessage
+
+import httpx
+from amadeus.client.response import Response
+from asgiref.sync import sync_to_async
+
+from .amadeus_replay import fixture_store, faults, get_backend, _recorded, _UrlopenResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _sdk_headers(items):
+    # httpx lower-cases header names; the SDK parser looks up 'Content-Type'
+    headers = HTTPMessage()
+    for key, value in items:
+        headers['-'.join(part.capitalize() for part in key.split('-'))] = value
+    return headers
+
+
+class AsyncAmadeus:
+    """Async counterpart of the Amadeus SDK client for the search views.
+
+    Responses are parsed by the SDK's own ``Response``, so callers get the
+    same ``.data``/``.result`` and the same ``ResponseError`` subclasses as
+    with the sync client. Calls use the shared access token and take a slot
+    from the same adaptive limiter. One ``httpx.AsyncClient`` (and connection
+    pool) is kept per event loop, which under ASGI means one per worker.
+    """
+
+    def __init__(self, client, token_manager, base_url, limiter, transport_factory=None,
+                 timeout=20, max_connections=100):
+        self.client = client
+        self.token_manager = token_manager
+        self.base_url = base_url
+        self.limiter = limiter
+        self.transport_factory = transport_factory
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _http(self):
+        loop = asyncio.get_running_loop()
+        http = self._clients.get(loop)
+        if http is None:
+            http = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self.transport_factory() if self.transport_factory else None,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._clients[loop] = http
+        return http
+
+    async def _send(self, method, path, params, body):
+        # The token is almost always cached; a refresh takes a file lock, so
+        # keep it off the event loop
+        token = await sync_to_async(self.token_manager.get_token, thread_sensitive=False)()
+        started_at = await self.limiter.acquire_async()
+        overloaded = False
+        try:
+            response = await self._http().request(
+                method, path, params=params, json=body,
+                headers={'Authorization': f'Bearer {token}'})
+            overloaded = response.status_code == 429 or response.status_code >= 500
+            return _UrlopenResponse(
+                response.status_code, _sdk_headers(response.headers.multi_items()), response.content)
+        except httpx.HTTPError as error:
+            # Parsed as a NetworkError below, as the SDK does for URLError
+            overloaded = True
+            logger.warning(f"Async Amadeus call {method} {path} failed: {error}")
+            return _UrlopenResponse(None, HTTPMessage(), b'')
+        finally:
+            self.limiter.release(started_at, overloaded)
+
+    async def request(self, method, path, params=None, body=None):
+        http_response = await self._send(method, path, params, body)
+        if http_response.status == 401:
+            # Token revoked or expired early: fetch a new one and retry once
+            self.token_manager.invalidate()
+            http_response = await self._send(method, path, params, body)
+        response = Response(http_response, None)._parse(self.client)
+        response._detect_error(self.client)
+        return response
+
+    async def get(self, path, **params):
+        return await self.request('GET', path, params=params)
+
+    async def post(self, path, body):
+        return await self.request('POST', path, body=body)
+
+
+class AsyncReplayTransport(httpx.AsyncBaseTransport):
+    """httpx transport for the async search views (demo.async_views)."""
+
+    def __init__(self, store, mode, faults, live=None):
+        self.store = store
+        self.mode = mode
+        self.faults = faults
+        self.live = live or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        method, url, body = request.method, str(request.url), await request.aread()
+        if self.mode == 'record':
+            response = await self.live.handle_async_request(request)
+            content = await response.aread()
+            self.store.save(method, url, body, response.status_code, response.headers.get('Content-Type'), content)
+            return httpx.Response(response.status_code, headers=response.headers, content=content)
+
+        fixture = _recorded(self.store, method, url, body)
+        delay = self.faults.delay()
+        if delay:
+            await asyncio.sleep(delay)
+        fixture = self.faults.inject(fixture)
+        headers = {'Content-Type': fixture['content_type']} if fixture.get('content_type') else {}
+        return httpx.Response(fixture['status'], headers=headers, content=fixture['body'].encode())
+
+    async def aclose(self):
+        await self.live.aclose()
+
+
+def async_transport():
+    """httpx transport for the async Amadeus client, or None to go live."""
+    backend = get_backend()
+    if backend == 'live':
+        return None
+    return AsyncReplayTransport(fixture_store, backend, faults)
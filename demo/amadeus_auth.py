@@ -0,0 +1,102 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from .file_lock import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """Caches an OAuth access token and shares it between threads and processes.
+
+    The token is reused until ``expiry_margin`` seconds before it expires.
+    Once fewer than ``refresh_before`` seconds are left, a background thread
+    fetches a new one while callers keep using the current token. Refreshes
+    are serialized across processes with a file lock, and the refreshed token
+    is written next to the lock so other gunicorn workers pick it up instead
+    of requesting their own.
+    """
+
+    def __init__(self, fetch_token, cache_path, refresh_before=300, expiry_margin=30):
+        # fetch_token() must return (access_token, expires_in_seconds)
+        self.fetch_token = fetch_token
+        self.cache_path = cache_path
+        self.lock_path = cache_path + '.lock'
+        self.refresh_before = refresh_before
+        self.expiry_margin = expiry_margin
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def get_token(self):
+        remaining = self._expires_at - time.time()
+        if self._token and remaining > self.expiry_margin:
+            if remaining < self.refresh_before:
+                self._refresh_in_background()
+            return self._token
+        return self._refresh()
+
+    def invalidate(self):
+        with self._lock:
+            self._token = None
+            self._expires_at = 0
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self._refresh(force=True)
+            except Exception as error:
+                # The current token is still valid; the next call will retry
+                logger.warning(f"Background token refresh failed: {error}")
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='amadeus-token-refresh', daemon=True).start()
+
+    def _refresh(self, force=False):
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not force and self._token and self._expires_at - time.time() > self.expiry_margin:
+                return self._token
+
+            with file_lock(self.lock_path):
+                token, expires_at = self._read_shared()
+                if token and expires_at - time.time() > self.refresh_before:
+                    # Another worker refreshed while we waited
+                    self._token, self._expires_at = token, expires_at
+                    return token
+
+                token, expires_in = self.fetch_token()
+                expires_at = time.time() + float(expires_in)
+                self._write_shared(token, expires_at)
+                self._token, self._expires_at = token, expires_at
+                return token
+
+    def _read_shared(self):
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+            return data['access_token'], float(data['expires_at'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None, 0
+
+    def _write_shared(self, token, expires_at):
+        try:
+            # Write then rename so readers never see a half-written file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_path))
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'access_token': token, 'expires_at': expires_at}, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as error:
+            logger.warning(f"Could not share access token with other workers: {error}")
@@ -0,0 +1,256 @@
+"""Record/replay stand-in for the Amadeus API.
+
+With ``AMADEUS_BACKEND = 'record'`` every Amadeus response, from the SDK
+client, the async client and the direct REST calls, is saved as a JSON fixture in
+``AMADEUS_FIXTURES_DIR``. The async client's httpx transport lives in
+``amadeus_async``, so the WSGI views never import httpx. With ``'replay'`` those fixtures are served instead
+of calling Amadeus, after an optional delay and with an optional share of
+injected errors, so searches and bookings can be load tested offline.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from http.client import HTTPMessage
+from io import BytesIO
+from urllib.error import HTTPError
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from requests import Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('live', 'record', 'replay')
+TOKEN_PATH = '/v1/security/oauth2/token'
+REPLAY_TOKEN = {
+    'type': 'amadeusOAuth2Token',
+    'access_token': 'replay-token',
+    'token_type': 'Bearer',
+    'expires_in': 1799,
+    'state': 'approved',
+}
+
+
+class FixtureStore:
+    """One JSON file per distinct request: method, path, sorted query and
+    request body. A request with no exact match falls back to any fixture
+    recorded for the same method and path."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _names(self, method, url, body):
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        # Token requests carry the client secret; never let it reach the disk
+        if parts.path == TOKEN_PATH or body is None:
+            body = b''
+        elif isinstance(body, str):
+            body = body.encode()
+        digest = hashlib.sha1(method.encode() + b' ' + query.encode() + b' ' + body).hexdigest()[:16]
+        prefix = method.upper() + parts.path.replace('/', '_')
+        return prefix, f'{prefix}-{digest}.json'
+
+    def load(self, method, url, body):
+        prefix, name = self._names(method, url, body)
+        path = os.path.join(self.directory, name)
+        if not os.path.exists(path):
+            candidates = sorted(
+                f for f in os.listdir(self.directory) if f.startswith(prefix + '-')
+            ) if os.path.isdir(self.directory) else []
+            if not candidates:
+                return None
+            path = os.path.join(self.directory, candidates[0])
+        with open(path) as f:
+            return json.load(f)
+
+    def save(self, method, url, body, status, content_type, content):
+        _, name = self._names(method, url, body)
+        if urlsplit(url).path == TOKEN_PATH:
+            content = json.dumps(REPLAY_TOKEN).encode()
+        fixture = {
+            'method': method.upper(),
+            'url': urlsplit(url)._replace(scheme='', netloc='').geturl(),
+            'status': status,
+            'content_type': content_type,
+            'body': content.decode('utf8', errors='replace'),
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), 'w') as f:
+                json.dump(fixture, f, indent=1)
+
+
+class Faults:
+    """Latency and error injection applied to every replayed response."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self):
+        if not self.latency:
+            return 0
+        return max(0, random.uniform(self.latency * (1 - self.jitter), self.latency * (1 + self.jitter)))
+
+    def inject(self, fixture):
+        if self.error_rate and random.random() < self.error_rate:
+            return _error_fixture(self.error_status, 'Injected error')
+        return fixture
+
+    def apply(self, fixture):
+        delay = self.delay()
+        if delay:
+            time.sleep(delay)
+        return self.inject(fixture)
+
+
+def _error_fixture(status, detail):
+    return {
+        'status': status,
+        'content_type': 'application/vnd.amadeus+json',
+        'body': json.dumps({'errors': [{'status': status, 'code': 0, 'title': 'REPLAY', 'detail': detail}]}),
+    }
+
+
+def _recorded(store, method, url, body):
+    fixture = store.load(method, url, body)
+    if fixture is None:
+        if urlsplit(url).path == TOKEN_PATH:
+            fixture = {'status': 200, 'content_type': 'application/json', 'body': json.dumps(REPLAY_TOKEN)}
+        else:
+            logger.warning(f"No recorded Amadeus response for {method} {url}")
+            fixture = _error_fixture(404, f'No recorded response for {method} {urlsplit(url).path}')
+    return fixture
+
+
+def _replayed(store, faults, method, url, body):
+    return faults.apply(_recorded(store, method, url, body))
+
+
+class _UrlopenResponse:
+    # Just enough of http.client.HTTPResponse for the Amadeus SDK parser
+    def __init__(self, status, headers, body):
+        self.status = self.code = status
+        self.headers = headers
+        self._body = body
+
+    def info(self):
+        return self.headers
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+    def read(self):
+        return self._body
+
+
+class ReplayHttp:
+    """``urlopen``-style callable for ``amadeus.Client(http=...)``."""
+
+    def __init__(self, store, mode, urlopen, faults):
+        self.store = store
+        self.mode = mode
+        self.urlopen = urlopen
+        self.faults = faults
+
+    def __call__(self, request, *args, **kwargs):
+        method, url, body = request.get_method(), request.full_url, request.data
+        if self.mode == 'record':
+            try:
+                response = self.urlopen(request, *args, **kwargs)
+            except HTTPError as error:
+                content = error.read()
+                self.store.save(method, url, body, error.code, error.headers.get('Content-Type'), content)
+                raise HTTPError(error.url, error.code, error.msg, error.headers, BytesIO(content))
+            content = response.read()
+            self.store.save(method, url, body, response.status, response.headers.get('Content-Type'), content)
+            return _UrlopenResponse(response.status, response.headers, content)
+
+        fixture = _replayed(self.store, self.faults, method, url, body)
+        headers = HTTPMessage()
+        if fixture.get('content_type'):
+            headers['Content-Type'] = fixture['content_type']
+        content = fixture['body'].encode()
+        if fixture['status'] >= 400:
+            # urlopen raises for error statuses and so does the stand-in
+            raise HTTPError(url, fixture['status'], 'Replayed error', headers, BytesIO(content))
+        return _UrlopenResponse(fixture['status'], headers, content)
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport adapter for the direct REST calls in ``http_client``."""
+
+    def __init__(self, store, mode, faults, pool_connections=10, pool_maxsize=10):
+        super().__init__()
+        self.store = store
+        self.mode = mode
+        self.faults = faults
+        self.live = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+
+    def send(self, request, **kwargs):
+        if self.mode == 'record':
+            response = self.live.send(request, **kwargs)
+            self.store.save(request.method, request.url, request.body, response.status_code,
+                            response.headers.get('Content-Type'), response.content)
+            return response
+
+        fixture = _replayed(self.store, self.faults, request.method, request.url, request.body)
+        response = Response()
+        response.status_code = fixture['status']
+        response.headers = CaseInsensitiveDict({'Content-Type': fixture.get('content_type') or ''})
+        response._content = fixture['body'].encode()
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'Replayed'
+        return response
+
+    def close(self):
+        self.live.close()
+
+
+def get_backend():
+    backend = getattr(settings, 'AMADEUS_BACKEND', 'live')
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f"AMADEUS_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}")
+    return backend
+
+
+fixture_store = FixtureStore(getattr(settings, 'AMADEUS_FIXTURES_DIR', os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'amadeus')))
+
+faults = Faults(
+    latency=getattr(settings, 'AMADEUS_REPLAY_LATENCY', 0.0),
+    jitter=getattr(settings, 'AMADEUS_REPLAY_JITTER', 0.0),
+    error_rate=getattr(settings, 'AMADEUS_REPLAY_ERROR_RATE', 0.0),
+    error_status=getattr(settings, 'AMADEUS_REPLAY_ERROR_STATUS', 500),
+)
+
+
+def amadeus_http(urlopen):
+    """The ``http`` callable for the SDK client under ``AMADEUS_BACKEND``."""
+    backend = get_backend()
+    if backend == 'live':
+        return urlopen
+    return ReplayHttp(fixture_store, backend, urlopen, faults)
+
+
+def configure_http_client(client):
+    """Route ``client``'s Amadeus REST calls through the stand-in, if enabled."""
+    backend = get_backend()
+    if backend == 'live':
+        return
+    for host in ('https://test.api.amadeus.com', 'https://api.amadeus.com'):
+        client.mount(host, lambda: ReplayAdapter(
+            fixture_store, backend, faults, client.pool_connections, client.pool_maxsize))
@@ -4,6 +4,5 @@ from django.apps import AppConfig
 class DemoConfig(AppConfig):
     name = 'demo'
 
-
-def ready(self):
-    import demo.signals
\ No newline at end of file
+    def ready(self):
+        import demo.signals  # noqa: F401
@@ -0,0 +1,379 @@
+"""Async versions of the search views, served when ``ASYNC_SEARCH_VIEWS`` is on.
+
+Under ASGI (online_booking_tool.asgi) a search waiting on Amadeus holds a
+coroutine rather than a worker thread. Upstream calls go through
+``amadeus_async``; the ORM, sessions and template rendering are sync-only in
+this Django version, so those parts run through ``sync_to_async``. Django
+3.2 cannot stream from async views, so results pages are sent whole.
+
+Thread-sensitive ``sync_to_async`` calls all share one thread per process,
+so only quick ORM calls go there. Rendering, offer building and anything
+that can wait (the geocoder) run on pool threads through
+``off_shared_thread``.
+"""
+import asyncio
+import time
+
+from amadeus import ResponseError, Location
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+
+from .airports import local_locations
+from .amadeus_async import AsyncAmadeus, async_transport
+from .fare_matrix import date_grid, cheapest_price, build_matrix
+from .geocoding import AddressPage
+from .hotel_catalog import cached_city_hotel_ids, save_city_hotel_ids
+from .http_client import amadeus_url
+from .limiter import amadeus_limiter, LimitExceeded
+from .pricing import get_increment_value
+from .room import Room
+from .search_cache import search_cache, location_cache, flight_search_key, location_search_key
+from .singleflight import amadeus_calls
+from .views import (
+    amadeus, token_manager, logger, UPSTREAM_BUSY_MESSAGE, upstream_error_message, build_flight_offers, fetch_city_hotel_ids,
+    unique_hotel_offers, render_hotel_cards, get_city_airport_list, get_city_list,
+)
+
+amadeus_async = AsyncAmadeus(
+    amadeus,
+    token_manager,
+    amadeus_url(''),
+    amadeus_limiter,
+    transport_factory=async_transport,
+    timeout=settings.AMADEUS_REQUEST_TIMEOUT,
+    max_connections=settings.AMADEUS_ASYNC_MAX_CONNECTIONS,
+)
+
+
+
+def off_shared_thread(func):
+    """``sync_to_async(func)`` on a pool thread instead of the shared one, so
+    a slow call only holds up its own request. The pool thread closes its
+    DB connection afterwards, as the other worker threads do."""
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+arender = off_shared_thread(render)
+
+
+async def cached_call(key, fetch, use_cache=True, cache=search_cache):
+    # Same cache and coalescing as the sync views, awaited instead of blocked on
+    if use_cache:
+        found, value = cache.get(key)
+        if found:
+            return value
+    value = await amadeus_calls.do_async(key, fetch)
+    cache.set(key, value)
+    return value
+
+
+async def demo(request):
+    user = request.user
+    origin = request.POST.get("Origin")
+    destination = request.POST.get("Destination")
+    departure_date = request.POST.get("Departuredate")
+    return_date = request.POST.get("Returndate")
+    passenger_count = request.POST.get("passengerCount")
+    use_cache = not request.POST.get("refresh")
+
+    kwargs = {
+        "originLocationCode": origin,
+        "destinationLocationCode": destination,
+        "departureDate": departure_date,
+        "adults": passenger_count,
+    }
+    if return_date:
+        kwargs["returnDate"] = return_date
+
+    if origin and destination and departure_date and request.POST.get("flexibleDates"):
+        return await flexible_date_search(request, origin, destination, departure_date,
+                                          return_date, passenger_count, use_cache)
+
+    if origin and destination and departure_date:
+        started_at = time.monotonic()
+        trip_purpose_task = None
+        if return_date:
+            async def fetch_trip_purpose():
+                response = await amadeus_async.get(
+                    '/v1/travel/predictions/trip-purpose',
+                    originLocationCode=origin, destinationLocationCode=destination,
+                    departureDate=departure_date, returnDate=return_date)
+                return response.data
+
+            trip_purpose_task = asyncio.ensure_future(cached_call(
+                flight_search_key("trip_purpose", origin, destination, departure_date, return_date),
+                fetch_trip_purpose, use_cache))
+
+        async def fetch_offers():
+            response = await amadeus_async.get('/v2/shopping/flight-offers', **kwargs)
+            return response.data
+
+        try:
+            search_flights = await cached_call(
+                flight_search_key("flight_offers", origin, destination,
+                                  departure_date, return_date, passenger_count),
+                fetch_offers, use_cache)
+        except ResponseError as error:
+            messages.error(request, upstream_error_message(error))
+            return await arender(request, "demo/home.html")
+        except LimitExceeded:
+            messages.error(request, UPSTREAM_BUSY_MESSAGE)
+            return await arender(request, "demo/home.html")
+
+        tripPurpose = ""
+        if trip_purpose_task is not None:
+            # Trip purpose is decoration: give up on it once the soft timeout is spent
+            remaining = max(0, settings.TRIP_PURPOSE_TIMEOUT - (time.monotonic() - started_at))
+            try:
+                # shield: a late answer still lands in the search cache
+                tripPurpose = (await asyncio.wait_for(asyncio.shield(trip_purpose_task), remaining)
+                               or {}).get("result", "")
+            except Exception as error:
+                logger.warning(f"Trip purpose unavailable, continuing without it: {error!r}")
+
+        offers = await off_shared_thread(build_flight_offers)(search_flights, user)
+        if not offers:
+            messages.info(request, "No flight itinerary for this route.")
+            return redirect('home')
+
+        return await arender(request, "demo/results.html", {
+            "origin": origin,
+            "destination": destination,
+            "departureDate": departure_date,
+            "returnDate": return_date,
+            "offers": offers,
+            "tripPurpose": tripPurpose,
+        })
+
+    return await arender(request, "demo/home.html")
+
+
+async def flexible_date_search(request, origin, destination, departure_date, return_date, passenger_count,
+                               use_cache):
+    try:
+        grid = date_grid(departure_date, return_date, settings.FLEX_DATE_DAYS)
+    except ValueError:
+        messages.error(request, "Please enter valid travel dates.")
+        return await arender(request, "demo/home.html")
+    semaphore = asyncio.Semaphore(settings.FLEX_DATE_CONCURRENCY)
+
+    async def search_cell(cell):
+        cell_departure, cell_return = cell
+        params = {
+            "originLocationCode": origin,
+            "destinationLocationCode": destination,
+            "departureDate": cell_departure,
+            "adults": passenger_count,
+        }
+        if cell_return:
+            params["returnDate"] = cell_return
+
+        async def fetch():
+            response = await amadeus_async.get('/v2/shopping/flight-offers', **params)
+            return response.data
+
+        async with semaphore:
+            return await cached_call(
+                flight_search_key("flight_offers", origin, destination, cell_departure, cell_return, passenger_count),
+                fetch, use_cache)
+
+    results = await asyncio.gather(*(search_cell(cell) for cell in grid), return_exceptions=True)
+
+    increment_value = await sync_to_async(get_increment_value)()
+    prices = {}
+    first_error = None
+    for cell, result in zip(grid, results):
+        if isinstance(result, (ResponseError, LimitExceeded)):
+            logger.warning(f"Flexible-date search {origin}-{destination} {cell} failed: {result}")
+            first_error = first_error or result
+            prices[cell] = None
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        prices[cell] = cheapest_price(result, increment_value)
+
+    if not any(price is not None for price in prices.values()):
+        if isinstance(first_error, LimitExceeded):
+            messages.error(request, UPSTREAM_BUSY_MESSAGE)
+        elif first_error is not None:
+            messages.error(request, upstream_error_message(first_error))
+        else:
+            messages.info(request, "No flight itinerary for these dates.")
+        return await arender(request, "demo/home.html")
+
+    return await arender(request, "demo/flight_results/matrix.html", {
+        "origin": origin,
+        "destination": destination,
+        "departureDate": departure_date,
+        "returnDate": return_date or None,
+        "passengerCount": passenger_count,
+        "flex_days": settings.FLEX_DATE_DAYS,
+        "matrix": build_matrix(prices),
+    })
+
+
+def render_hotel_page(request, header, chunks):
+    parts = [render_to_string('demo/hotel/results/head.html', header, request)]
+    address_page = AddressPage()
+    parts.extend(render_hotel_cards(request, header, hotels, address_page) for hotels in chunks)
+    parts.append(render_to_string('demo/hotel/results/foot.html', {'no_results': False}, request))
+    return HttpResponse(''.join(parts))
+
+
+async def city_hotel_ids(city_code):
+    # The catalogue lookup is one quick query; a city never fetched before is
+    # fetched with the async client rather than blocking a thread on Amadeus
+    city_code = city_code.upper()
+    hotel_ids = await sync_to_async(cached_city_hotel_ids)(city_code, fetch_city_hotel_ids)
+    if hotel_ids is None:
+        async def fetch():
+            response = await amadeus_async.get('/v1/reference-data/locations/hotels/by-city', cityCode=city_code)
+            return list(dict.fromkeys(hotel['hotelId'] for hotel in response.data))
+
+        hotel_ids = await amadeus_calls.do_async(('hotels_by_city', city_code), fetch)
+        await sync_to_async(save_city_hotel_ids)(city_code, hotel_ids)
+    return hotel_ids
+
+
+def set_guest_count(request, guest_count):
+    # Store guest count in session for later use during booking
+    request.session['guest_count'] = guest_count
+
+
+async def hotel(request):
+    origin = request.POST.get('Origin')
+    checkinDate = request.POST.get('Checkindate')
+    checkoutDate = request.POST.get('Checkoutdate')
+    guest_count = request.POST.get('guestCount', '1')
+
+    if origin and checkinDate and checkoutDate:
+        await sync_to_async(set_guest_count)(request, int(guest_count))
+
+        try:
+            hotel_ids = await city_hotel_ids(origin)
+        except ResponseError as error:
+            messages.add_message(request, messages.ERROR, error.response.body or UPSTREAM_BUSY_MESSAGE)
+            return await arender(request, 'demo/hotel/demo_form.html', {})
+        except LimitExceeded:
+            messages.add_message(request, messages.ERROR, UPSTREAM_BUSY_MESSAGE)
+            return await arender(request, 'demo/hotel/demo_form.html', {})
+
+        if settings.HOTEL_SEARCH_MAX_HOTELS:
+            hotel_ids = hotel_ids[:settings.HOTEL_SEARCH_MAX_HOTELS]
+        chunk_size = settings.HOTEL_OFFERS_CHUNK_SIZE
+        chunks = [hotel_ids[i:i + chunk_size] for i in range(0, len(hotel_ids), chunk_size)]
+        semaphore = asyncio.Semaphore(settings.HOTEL_SEARCH_CONCURRENCY)
+
+        async def search_chunk(chunk):
+            async def fetch():
+                response = await amadeus_async.get(
+                    '/v3/shopping/hotel-offers', hotelIds=chunk, checkInDate=checkinDate,
+                    checkOutDate=checkoutDate, adults=int(guest_count))
+                return response.data
+
+            async with semaphore:
+                return await amadeus_calls.do_async(
+                    ('hotel_offers', tuple(chunk), checkinDate, checkoutDate, int(guest_count)), fetch)
+
+        results = await asyncio.gather(*(search_chunk(chunk) for chunk in chunks), return_exceptions=True)
+
+        seen = set()
+        found = []
+        first_error = None
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, (ResponseError, LimitExceeded)):
+                logger.warning(f"Hotel offers search failed for {len(chunk)} hotels: {result}")
+                first_error = first_error or result
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            hotels = unique_hotel_offers(result, seen)
+            if hotels:
+                found.append(hotels)
+
+        if not found:
+            if isinstance(first_error, LimitExceeded):
+                messages.add_message(request, messages.ERROR, UPSTREAM_BUSY_MESSAGE)
+            elif first_error is not None:
+                messages.add_message(request, messages.ERROR, first_error.response.body or UPSTREAM_BUSY_MESSAGE)
+            else:
+                messages.add_message(request, messages.ERROR, 'No hotels found.')
+            return await arender(request, 'demo/hotel/demo_form.html', {})
+
+        header = {
+            'origin': origin,
+            'departureDate': checkinDate,
+            'returnDate': checkoutDate,
+        }
+        # Geocoding can wait up to GEOCODE_WAIT, so this runs off the shared thread
+        return await off_shared_thread(render_hotel_page)(request, header, found)
+    return await arender(request, 'demo/hotel/demo_form.html', {})
+
+
+async def rooms_per_hotel(request, hotel, departureDate, returnDate):
+    async def fetch():
+        response = await amadeus_async.get(
+            '/v3/shopping/hotel-offers', hotelIds=hotel, checkInDate=departureDate, checkOutDate=returnDate)
+        return response.data
+
+    try:
+        # Search for rooms in a given hotel
+        rooms = await amadeus_calls.do_async(('hotel_rooms', hotel, departureDate, returnDate), fetch)
+        hotel_rooms = Room(rooms).construct_room()
+        return await arender(request, 'demo/hotel/rooms_per_hotel.html', {
+            'response': hotel_rooms,
+            'name': rooms[0]['hotel']['name'],
+        })
+    except LimitExceeded:
+        messages.add_message(request, messages.ERROR, UPSTREAM_BUSY_MESSAGE)
+        return await arender(request, 'demo/hotel/rooms_per_hotel.html', {})
+    except (TypeError, AttributeError, ResponseError, KeyError, IndexError) as error:
+        messages.add_message(request, messages.ERROR, error)
+        return await arender(request, 'demo/hotel/rooms_per_hotel.html', {})
+
+
+async def search_upstream_locations(request):
+    # Answer from the local airport index; Amadeus fills in what it lacks
+    term = request.GET.get('term', None)
+    local_matches, complete = local_locations(term)
+    if complete:
+        return local_matches, []
+
+    async def fetch():
+        response = await amadeus_async.get('/v1/reference-data/locations', keyword=term, subType=Location.ANY)
+        return response.data
+
+    try:
+        # Cached per term, like the sync views' search_locations_upstream
+        data = await cached_call(location_search_key(term), fetch, cache=location_cache)
+        return local_matches, data
+    except (ResponseError, LimitExceeded) as error:
+        logger.warning(f"Location search for {term!r} failed: {error}")
+        return local_matches, []
+
+
+async def origin_airport_search(request):
+    data, local_matches = [], []
+    if request.is_ajax():
+        local_matches, data = await search_upstream_locations(request)
+    return HttpResponse(get_city_airport_list(data, local_matches), content_type="application/json")
+
+
+destination_airport_search = origin_airport_search
+
+
+async def city_search(request):
+    data, local_matches = [], []
+    if request.is_ajax():
+        local_matches, data = await search_upstream_locations(request)
+    return HttpResponse(get_city_list(data, local_matches), 'application/json')
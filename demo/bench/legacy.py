@@ -0,0 +1,89 @@
+"""The dict based offer builder from before demo.flight.Offer, kept so the
+benchmarks can compare against it. Not used by the application."""
+import re
+from datetime import datetime
+
+
+def legacy_construct_flights(flight, increment_value=0):
+    offer = {}
+    index = 0
+    offer['price'] = float(flight['price']['total']) * 1600 + increment_value
+    offer['id'] = flight['id']
+
+    for f in flight['itineraries']:
+        # Keys starting from 0 correspond to Outbound flights and the keys starting from 1 to Return flights
+        if len(flight['itineraries'][index]['segments']) == 2:  # One-stop flight
+            offer[str(index) + 'firstFlightDepartureAirport'] = flight['itineraries'][index]['segments'][0]['departure']['iataCode']
+            offer[str(index) + 'firstFlightAirlineLogo'] = get_airline_logo(flight['itineraries'][index]['segments'][0]['carrierCode'])
+            offer[str(index) + 'firstFlightAirline'] = flight['itineraries'][index]['segments'][0]['carrierCode']
+            offer[str(index) + 'firstFlightDepartureDate'] = get_hour(flight['itineraries'][index]['segments'][0]['departure']['at'])
+            offer[str(index) + 'firstFlightArrivalAirport'] = flight['itineraries'][index]['segments'][0]['arrival']['iataCode']
+            offer[str(index) + 'firstFlightArrivalDate'] = get_hour(flight['itineraries'][index]['segments'][0]['arrival']['at'])
+            offer[str(index) + 'firstFlightArrivalDuration'] = flight['itineraries'][index]['segments'][0]['duration']
+            offer[str(index) + 'secondFlightDepartureAirport'] = flight['itineraries'][index]['segments'][1]['departure']['iataCode']
+            offer[str(index) + 'secondFlightDepartureDate'] = get_hour(flight['itineraries'][index]['segments'][1]['departure']['at'])
+            offer[str(index) + 'secondFlightAirlineLogo'] = get_airline_logo(flight['itineraries'][index]['segments'][1]['carrierCode'])
+            offer[str(index) + 'secondFlightAirline'] = flight['itineraries'][index]['segments'][1]['carrierCode']
+            offer[str(index) + 'secondFlightArrivalAirport'] = flight['itineraries'][index]['segments'][1]['arrival']['iataCode']
+            offer[str(index) + 'secondFlightArrivalDate'] = get_hour(flight['itineraries'][index]['segments'][1]['arrival']['at'])
+            offer[str(index) + 'secondFlightArrivalDuration'] = flight['itineraries'][index]['segments'][1]['duration']
+            offer[str(index) + 'FlightTotalDuration'] = flight['itineraries'][index]['duration'][2:]
+            offer[str(index) + 'stop_time'] = get_stoptime(flight['itineraries'][index]['duration'],
+                                                           offer[str(index) + 'firstFlightArrivalDuration'],
+                                                           offer[str(index) + 'secondFlightArrivalDuration'])
+
+        elif len(flight['itineraries'][index]['segments']) == 1:  # Direct flight
+            offer[str(index) + 'firstFlightDepartureAirport'] = flight['itineraries'][index]['segments'][0]['departure']['iataCode']
+            offer[str(index) + 'firstFlightAirlineLogo'] = get_airline_logo(flight['itineraries'][index]['segments'][0]['carrierCode'])
+            offer[str(index) + 'firstFlightAirline'] = flight['itineraries'][index]['segments'][0]['carrierCode']
+            offer[str(index) + 'firstFlightDepartureDate'] = get_hour(flight['itineraries'][index]['segments'][0]['departure']['at'])
+            offer[str(index) + 'firstFlightArrivalAirport'] = flight['itineraries'][index]['segments'][0]['arrival']['iataCode']
+            offer[str(index) + 'firstFlightArrivalDate'] = get_hour(flight['itineraries'][index]['segments'][0]['arrival']['at'])
+            offer[str(index) + 'firstFlightArrivalDuration'] = flight['itineraries'][index]['segments'][0]['duration']
+            offer[str(index) + 'FlightTotalDuration'] = flight['itineraries'][index]['duration'][2:]
+
+        index += 1
+
+    return offer
+
+
+def get_airline_logo(carrier_code):
+    return "https://s1.apideeplink.com/images/airlines/" + carrier_code + ".png"
+
+
+def get_hour(date_time):
+    return datetime.strptime(date_time[0:19], "%Y-%m-%dT%H:%M:%S").strftime("%H:%M")
+
+
+def get_stoptime(total_duration, first_flight_duration, second_flight_duration):
+    if re.search('PT(.*)H', total_duration) is None:
+        total_duration_hours = 0
+    else:
+        total_duration_hours = int(re.search('PT(.*)H', total_duration).group(1))
+    if re.search('H(.*)M', total_duration) is None:
+        total_duration_minutes = 0
+    else:
+        total_duration_minutes = int(re.search('H(.*)M', total_duration).group(1))
+
+    if re.search('PT(.*)H', first_flight_duration) is None:
+        first_flight_hours = 0
+    else:
+        first_flight_hours = int(re.search('PT(.*)H', first_flight_duration).group(1))
+    if re.search('H(.*)M', first_flight_duration) is None:
+        first_flight_minutes = 0
+    else:
+        first_flight_minutes = int(re.search('H(.*)M', first_flight_duration).group(1))
+
+    if re.search('PT(.*)H', second_flight_duration) is None:
+        second_flight_hours = 0
+    else:
+        second_flight_hours = int(re.search('PT(.*)H', second_flight_duration).group(1))
+    if re.search('H(.*)M', second_flight_duration) is None:
+        second_flight_minutes = 0
+    else:
+        second_flight_minutes = int(re.search('H(.*)M', second_flight_duration).group(1))
+
+    connection_minutes = (total_duration_hours*60 + total_duration_minutes) - (first_flight_hours*60 + first_flight_minutes + second_flight_hours*60 + second_flight_minutes)
+    hours = connection_minutes // 60
+    minutes = connection_minutes % 60
+    return f'{hours}:{minutes:02d}'
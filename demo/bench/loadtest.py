@@ -0,0 +1,273 @@
+"""Scenarios and measurements for the ``loadtest`` management command.
+
+Each scenario drives one view through the Django test client. Amadeus is
+answered by the replay stand-in (demo.amadeus_replay) from fixtures built
+with demo.bench.payloads, so runs are repeatable and need no network.
+"""
+import asyncio
+import json
+import math
+import resource
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from demo.bench import payloads
+from demo.geocoding import geocode_key
+from demo.models import User, Admin, Staff, Profile, Flight_model, GeocodedAddress
+from demo.offer_store import store_offers
+
+AMADEUS_HOST = 'https://test.api.amadeus.com'
+ORIGIN, DESTINATION, DEPARTURE, RETURN = 'LOS', 'LHR', '2026-11-02', '2026-11-09'
+HOTEL_CITY, CHECK_IN, CHECK_OUT = 'LON', '2026-11-02', '2026-11-04'
+APPROVE_BATCH = 5
+
+
+def seed_fixtures(store, offer_count=50):
+    """Write one replay fixture per Amadeus endpoint the views call."""
+    offers = payloads.flight_offers(count=offer_count, origin=ORIGIN, destination=DESTINATION,
+                                    departure=DEPARTURE, return_date=RETURN)
+    hotels = payloads.hotel_list(HOTEL_CITY)
+
+    def save(method, path, data):
+        store.save(method, AMADEUS_HOST + path, None, 200, 'application/vnd.amadeus+json',
+                   json.dumps({'data': data}).encode())
+
+    save('GET', '/v2/shopping/flight-offers', offers)
+    save('GET', '/v1/travel/predictions/trip-purpose',
+         {'type': 'prediction', 'subType': 'trip-purpose', 'result': 'LEISURE', 'probability': '0.9'})
+    save('POST', '/v1/shopping/flight-offers/pricing',
+         {'type': 'flight-offers-pricing', 'flightOffers': offers[:1]})
+    save('POST', '/v1/booking/flight-orders', payloads.flight_order(offers[0]))
+    save('GET', '/v1/reference-data/locations/hotels/by-city', hotels)
+    save('GET', '/v3/shopping/hotel-offers', payloads.hotel_offers(hotels, CHECK_IN, CHECK_OUT))
+    save('GET', '/v1/reference-data/locations', payloads.locations())
+    return offers, hotels
+
+
+def seed_database(offers, hotels, rows=500, pending=0):
+    """Create the load-test user and the rows the admin views list.
+
+    Returns the state the scenarios share: the user, a stored offer id that
+    matches an approved flight (so booking goes all the way to the order
+    call), a hotel id and a queue of pending flight ids to approve.
+    """
+    user = User.objects.create_user(username='loadtest', email='loadtest@example.com',
+                                    password='loadtest', is_staff=True)
+    Profile.objects.create(user=user)
+    Admin.objects.create(admin=user, first_name='Load', last_name='Test', approval_status=True)
+
+    staff_users = []
+    for index in range(20):
+        staff_user = User.objects.create_user(username=f'staff{index}', email=f'staff{index}@example.com',
+                                              password='loadtest')
+        Profile.objects.create(user=staff_user)
+        Staff.objects.create(staff=staff_user, first_name=f'Staff{index}', last_name='Member')
+        staff_users.append(staff_user)
+
+    start = date(2026, 11, 1)
+    Flight_model.objects.bulk_create([
+        Flight_model(
+            user=staff_users[index % len(staff_users)],
+            origin=payloads.AIRPORTS[index % len(payloads.AIRPORTS)],
+            destination=payloads.AIRPORTS[(index + 3) % len(payloads.AIRPORTS)],
+            departure_date=start + timedelta(days=index % 90),
+            return_date=start + timedelta(days=index % 90 + 7) if index % 3 else None,
+            passenger_count=1 + index % 3,
+            travel_class='ECONOMY',
+            price=100000 + index,
+            approved=bool(index % 2),
+        ) for index in range(rows)
+    ])
+    Flight_model.objects.bulk_create([
+        Flight_model(
+            user=staff_users[index % len(staff_users)], origin=ORIGIN, destination=DESTINATION,
+            departure_date=start, passenger_count=1, travel_class='ECONOMY', price=200000 + index,
+        ) for index in range(pending)
+    ])
+    # bulk_create does not return primary keys on every backend
+    pending_ids = Flight_model.objects.filter(price__gte=200000, approved=False).values_list('pk', flat=True)
+
+    # An approved flight matching the booked offer, as book_flight looks it up
+    offer = offers[0]
+    Flight_model.objects.create(
+        user=user, origin=ORIGIN, destination=DESTINATION,
+        departure_date=offer['itineraries'][0]['segments'][0]['departure']['at'].split('T')[0],
+        return_date=offer['itineraries'][-1]['segments'][-1]['arrival']['at'].split('T')[0],
+        passenger_count=len(offer['travelerPricings']),
+        travel_class=offer['travelerPricings'][0]['fareDetailsBySegment'][0]['cabin'],
+        price=float(offer['price']['total']) * 1600,
+        approved=True,
+    )
+
+    # Known addresses so hotel pages never reach out to the geocoder
+    for hotel in hotels:
+        key = geocode_key(hotel['geoCode']['latitude'], hotel['geoCode']['longitude'])
+        GeocodedAddress.objects.get_or_create(latitude=key[0], longitude=key[1],
+                                              defaults={'address': 'Load Test Street 1'})
+
+    return {
+        'user': user,
+        'offer_id': store_offers([offer], user)[0],
+        'hotel_id': hotels[0]['hotelId'],
+        'pending': deque(pending_ids),
+        'pending_lock': threading.Lock(),
+    }
+
+
+def _ajax(client, name, term):
+    return client.get(reverse(name), {'term': term}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+
+def _approve(client, state):
+    with state['pending_lock']:
+        batch = [state['pending'].popleft() for _ in range(min(APPROVE_BATCH, len(state['pending'])))]
+    return client.post(reverse('approve_flight'), {'flight_ids': batch})
+
+
+SCENARIOS = {
+    'demo': lambda client, state: client.post(reverse('home'), {
+        'Origin': ORIGIN, 'Destination': DESTINATION, 'Departuredate': DEPARTURE,
+        'Returndate': RETURN, 'passengerCount': '1', 'refresh': '1'}),
+    'book_flight': lambda client, state: client.post(reverse('book_flight'), {'offer_id': state['offer_id']}),
+    'hotel': lambda client, state: client.post(reverse('hotel'), {
+        'Origin': HOTEL_CITY, 'Checkindate': CHECK_IN, 'Checkoutdate': CHECK_OUT, 'guestCount': '1'}),
+    'rooms_per_hotel': lambda client, state: client.get(
+        reverse('rooms_per_hotel', args=[state['hotel_id'], CHECK_IN, CHECK_OUT])),
+    'approve_flight': _approve,
+    'approve_flight_list': lambda client, state: client.get(reverse('approve_flight')),
+    'report': lambda client, state: client.get(reverse('report')),
+    'report_csv': lambda client, state: client.get(reverse('report'), {'export': 'csv'}),
+    'report_excel': lambda client, state: client.get(reverse('report'), {'export': 'excel'}),
+    'report_pdf': lambda client, state: client.get(reverse('report'), {'export': 'pdf'}),
+    # "LO" is answered by the local airport index, "QQX" by Amadeus (once, then by the location cache)
+    'origin_airport_search': lambda client, state: _ajax(client, 'origin_airport_search', 'LO'),
+    'origin_airport_search_upstream': lambda client, state: _ajax(client, 'origin_airport_search', 'QQX'),
+    'destination_airport_search': lambda client, state: _ajax(client, 'destination_airport_search', 'LHR'),
+    'city_search': lambda client, state: _ajax(client, 'city_search', 'PAR'),
+}
+
+
+def percentile(sorted_values, percent):
+    # Nearest-rank, so every reported value is an observed one
+    if not sorted_values:
+        return 0
+    index = max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def run_scenario(scenario, state, requests, concurrency, warmup=0):
+    """Call ``scenario`` ``requests`` times from ``concurrency`` threads and
+    return latency, throughput, query and memory figures."""
+    local = threading.local()
+
+    def call(_):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+            client.force_login(state['user'])
+        error = None
+        with CaptureQueriesContext(connection) as queries:
+            started_at = time.perf_counter()
+            try:
+                response = scenario(client, state)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                status = response.status_code
+            except Exception as exc:
+                status, error = None, f'{type(exc).__name__}: {exc}'
+            elapsed = time.perf_counter() - started_at
+        return elapsed, len(queries), status, error
+
+    rss_before = peak_rss_mb()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadtest') as pool:
+        list(pool.map(call, range(warmup)))
+        started_at = time.perf_counter()
+        results = list(pool.map(call, range(requests)))
+        wall = time.perf_counter() - started_at
+
+    latencies = sorted(elapsed * 1000 for elapsed, _, _, _ in results)
+    query_counts = [count for _, count, _, _ in results]
+    errors = [error or f'HTTP {status}' for _, _, status, error in results if status is None or status >= 500]
+    return {
+        'requests': len(results),
+        'concurrency': concurrency,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else 0,
+        'max_ms': round(latencies[-1], 2) if latencies else 0,
+        'throughput_rps': round(len(results) / wall, 2) if wall else 0,
+        'queries_mean': round(sum(query_counts) / len(query_counts), 1) if query_counts else 0,
+        'queries_max': max(query_counts, default=0),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_growth_mb': round(peak_rss_mb() - rss_before, 1),
+    }
+
+
+def check_overlap(state, searches=2, latency=0.5):
+    """Run ``searches`` hotel searches for uncatalogued cities at once through
+    the async views, and once on their own.
+
+    Every search waits on Amadeus for its city's hotel list and then renders
+    the page, so the returned ratio of the two wall times is about 1 when
+    concurrent requests overlap and close to ``searches`` when they are
+    serialized on a shared thread.
+    """
+    from asgiref.sync import sync_to_async
+    from django.contrib.messages.storage.fallback import FallbackStorage
+    from django.contrib.sessions.backends.db import SessionStore
+    from django.test import RequestFactory
+
+    from demo import async_views
+    from demo.amadeus_replay import faults
+    from demo.models import CityHotelList
+
+    factory = RequestFactory()
+
+    def hotel_request(city_code):
+        request = factory.post(reverse('hotel'), {'Origin': city_code, 'Checkindate': CHECK_IN,
+                                                  'Checkoutdate': CHECK_OUT, 'guestCount': '1'})
+        request.user = state['user']
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    async def timed(city_codes):
+        await sync_to_async(CityHotelList.objects.filter(city_code__in=city_codes).delete)()
+        requests = [hotel_request(city_code) for city_code in city_codes]
+        started_at = time.perf_counter()
+        responses = await asyncio.gather(*(async_views.hotel(request) for request in requests))
+        elapsed = time.perf_counter() - started_at
+        if any(response.status_code != 200 for response in responses):
+            raise RuntimeError(f'Hotel search failed: {[response.status_code for response in responses]}')
+        return elapsed
+
+    saved_latency, faults.latency = faults.latency, faults.latency or latency
+    try:
+        # First search warms the templates, the HTTP client and the token
+        asyncio.run(timed(['QZZ']))
+        alone = asyncio.run(timed(['QZA']))
+        together = asyncio.run(timed([f'QZ{chr(ord("B") + index)}' for index in range(searches)]))
+    finally:
+        faults.latency = saved_latency
+    return {
+        'searches': searches,
+        'alone_ms': round(alone * 1000, 2),
+        'together_ms': round(together * 1000, 2),
+        'ratio': round(together / alone, 2),
+    }
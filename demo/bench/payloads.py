@@ -0,0 +1,150 @@
+"""Synthetic Amadeus payloads shaped like real test API responses, for benchmarks."""
+import random
+from datetime import datetime, timedelta
+
+AIRPORTS = ['LOS', 'ABV', 'ACC', 'NBO', 'JNB', 'CAI', 'ADD', 'DXB', 'DOH', 'IST', 'CDG', 'AMS', 'FRA', 'LHR', 'JFK']
+CARRIERS = ['AF', 'KL', 'BA', 'LH', 'EK', 'QR', 'TK', 'ET', 'KQ', 'W3', 'P4', 'DL']
+
+
+def iso_duration(minutes):
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    text = 'P'
+    if days:
+        text += f'{days}D'
+    text += 'T'
+    if hours:
+        text += f'{hours}H'
+    if minutes or not hours:
+        text += f'{minutes}M'
+    return text
+
+
+def make_itinerary(rng, origin, destination, start, segment_count):
+    stops = rng.sample([a for a in AIRPORTS if a not in (origin, destination)], segment_count - 1)
+    points = [origin] + stops + [destination]
+    segments = []
+    at = start
+    for index, (dep, arr) in enumerate(zip(points, points[1:])):
+        flying = rng.randint(60, 480)
+        arrival = at + timedelta(minutes=flying)
+        segments.append({
+            'departure': {'iataCode': dep, 'terminal': '1', 'at': at.strftime('%Y-%m-%dT%H:%M:%S')},
+            'arrival': {'iataCode': arr, 'terminal': '2', 'at': arrival.strftime('%Y-%m-%dT%H:%M:%S')},
+            'carrierCode': rng.choice(CARRIERS),
+            'number': str(rng.randint(10, 9999)),
+            'aircraft': {'code': '789'},
+            'operating': {'carrierCode': rng.choice(CARRIERS)},
+            'duration': iso_duration(flying),
+            'id': str(index + 1),
+            'numberOfStops': 0,
+            'blacklistedInEU': False,
+        })
+        at = arrival + timedelta(minutes=rng.randint(45, 900))
+    total = int((datetime.strptime(segments[-1]['arrival']['at'], '%Y-%m-%dT%H:%M:%S') - start).total_seconds() // 60)
+    return {'duration': iso_duration(total), 'segments': segments}
+
+
+def make_flight_offer(rng, index, origin='LOS', destination='LHR', departure='2026-11-02', return_date='2026-11-09', adults=1):
+    itineraries = [make_itinerary(rng, origin, destination,
+                                  datetime.strptime(departure, '%Y-%m-%d') + timedelta(minutes=rng.randint(0, 1400)),
+                                  rng.choice([1, 1, 2, 2, 2, 3]))]
+    if return_date:
+        itineraries.append(make_itinerary(rng, destination, origin,
+                                          datetime.strptime(return_date, '%Y-%m-%d') + timedelta(minutes=rng.randint(0, 1400)),
+                                          rng.choice([1, 1, 2, 2, 2, 3])))
+    total = f'{rng.uniform(250, 2500):.2f}'
+    segment_ids = [segment['id'] for itinerary in itineraries for segment in itinerary['segments']]
+    return {
+        'type': 'flight-offer',
+        'id': str(index + 1),
+        'source': 'GDS',
+        'instantTicketingRequired': False,
+        'nonHomogeneous': False,
+        'oneWay': False,
+        'lastTicketingDate': departure,
+        'numberOfBookableSeats': rng.randint(1, 9),
+        'itineraries': itineraries,
+        'price': {'currency': 'EUR', 'total': total, 'base': total, 'grandTotal': total,
+                  'fees': [{'amount': '0.00', 'type': 'SUPPLIER'}, {'amount': '0.00', 'type': 'TICKETING'}]},
+        'pricingOptions': {'fareType': ['PUBLISHED'], 'includedCheckedBagsOnly': True},
+        'validatingAirlineCodes': [itineraries[0]['segments'][0]['carrierCode']],
+        'travelerPricings': [{
+            'travelerId': str(traveler + 1),
+            'fareOption': 'STANDARD',
+            'travelerType': 'ADULT',
+            'price': {'currency': 'EUR', 'total': total, 'base': total},
+            'fareDetailsBySegment': [{'segmentId': segment_id, 'cabin': 'ECONOMY', 'fareBasis': 'KLOWNG',
+                                      'class': 'K', 'includedCheckedBags': {'quantity': 1}}
+                                     for segment_id in segment_ids],
+        } for traveler in range(adults)],
+    }
+
+
+def flight_offers(count=250, seed=42, **kwargs):
+    rng = random.Random(seed)
+    return [make_flight_offer(rng, index, **kwargs) for index in range(count)]
+
+
+def hotel_list(city_code='LON', count=60, seed=42):
+    rng = random.Random(seed)
+    return [{
+        'chainCode': rng.choice(['HI', 'MC', 'RT', 'BW']),
+        'iataCode': city_code,
+        'dupeId': 700000000 + index,
+        'name': f'{city_code} HOTEL {index + 1}',
+        'hotelId': f'{city_code[:2]}{city_code}{index:03d}',
+        # A handful of distinct points so reverse geocoding has few keys
+        'geoCode': {'latitude': 51.5 + (index % 5) / 100, 'longitude': -0.12 - (index % 5) / 100},
+        'address': {'countryCode': 'GB'},
+    } for index in range(count)]
+
+
+def hotel_offers(hotels, check_in='2026-11-02', check_out='2026-11-04', seed=42):
+    rng = random.Random(seed)
+    offers = []
+    for hotel in hotels:
+        offers.append({
+            'type': 'hotel-offers',
+            'hotel': {
+                'type': 'hotel',
+                'hotelId': hotel['hotelId'],
+                'chainCode': hotel['chainCode'],
+                'name': hotel['name'],
+                'cityCode': hotel['iataCode'],
+                'latitude': hotel['geoCode']['latitude'],
+                'longitude': hotel['geoCode']['longitude'],
+            },
+            'available': True,
+            'offers': [{
+                'id': f'{hotel["hotelId"]}OFFER{room}',
+                'checkInDate': check_in,
+                'checkOutDate': check_out,
+                'room': {'type': 'A1K', 'description': {'text': f'Room type {room + 1}, 1 king bed', 'lang': 'EN'}},
+                'guests': {'adults': 1},
+                'price': {'currency': 'GBP', 'total': f'{rng.uniform(80, 600):.2f}'},
+            } for room in range(rng.randint(1, 4))],
+        })
+    return offers
+
+
+def locations(count=10):
+    return [{
+        'type': 'location',
+        'subType': 'AIRPORT',
+        'name': f'AIRPORT {code}',
+        'iataCode': code,
+        'address': {'cityName': f'CITY {code}', 'countryCode': 'XX'},
+    } for code in AIRPORTS[:count]]
+
+
+def flight_order(offer, reference='LOADTS'):
+    return {
+        'type': 'flight-order',
+        'id': reference,
+        'associatedRecords': [{'reference': reference, 'creationDate': '2026-10-18T10:00:00.000',
+                               'originSystemCode': 'GDS', 'flightOfferId': offer['id']}],
+        'flightOffers': [offer],
+        'travelers': [{'id': '1', 'name': {'firstName': 'JORGE', 'lastName': 'GONZALES'}}],
+        'ticketingAgreement': {'option': 'CONFIRM'},
+    }
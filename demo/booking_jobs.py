@@ -0,0 +1,164 @@
+"""Database-backed queue for flight bookings.
+
+``book_flight`` only queues a job; the ``run_booking_worker`` command prices
+and orders the flight, so no web worker or DB transaction waits on Amadeus.
+Jobs are claimed with a conditional UPDATE, which works the same on SQLite
+and Postgres and lets several workers share the table.
+
+Only failures before the order request is sent are retried. Once it has
+gone out, Amadeus may have created the order even if we never saw the
+answer, so such a job is marked ``review`` for someone to check by hand
+rather than risk booking the flight twice. Where no worker can
+run (serverless deployments), ``BOOKING_INLINE`` makes the web request run
+its own job through ``run_inline``.
+"""
+import logging
+from datetime import timedelta
+
+import requests
+from amadeus.client.errors import NetworkError, ServerError, ClientError
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .limiter import LimitExceeded
+from .models import BookingJob
+from .queues import backoff_delay, claimable, lease_cutoff
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_booking(user, offer_id, offer, flight):
+    """Queue the booking of ``offer`` and return its job. A job already
+    queued or done for the same offer is returned instead of a new one."""
+    try:
+        with transaction.atomic():
+            return BookingJob.objects.create(user=user, offer_id=offer_id, offer=offer, flight=flight)
+    except IntegrityError:
+        return BookingJob.objects.exclude(status=BookingJob.FAILED).get(offer_id=offer_id)
+
+
+class OrderOutcomeUnknown(Exception):
+    """The order request was sent, but whether Amadeus placed the order is
+    not known (a 5xx, a timeout or a dropped connection)."""
+
+
+def _claimable(now):
+    # Pending jobs that are due, and running jobs whose worker has gone quiet
+    # before sending the order
+    return claimable(now, BookingJob.PENDING, BookingJob.RUNNING, 'run_after',
+                     getattr(settings, 'BOOKING_JOB_LEASE', 300), order_sent_at__isnull=True)
+
+
+def _review_abandoned(now):
+    # A worker that stopped after sending the order may have booked the flight
+    cutoff = lease_cutoff(now, getattr(settings, 'BOOKING_JOB_LEASE', 300))
+    BookingJob.objects.filter(status=BookingJob.RUNNING, locked_at__lt=cutoff,
+                              order_sent_at__isnull=False).update(
+        status=BookingJob.REVIEW, locked_at=None, updated_at=now,
+        last_error='Worker stopped after sending the order')
+
+
+def mark_order_sent(job):
+    """Record that ``job``'s order request is about to go out."""
+    job.order_sent_at = timezone.now()
+    BookingJob.objects.filter(pk=job.pk).update(order_sent_at=job.order_sent_at)
+
+
+def claim_job(pk=None):
+    """Mark the next due job (or job ``pk``, if it is due) as running and
+    return it, or None."""
+    now = timezone.now()
+    _review_abandoned(now)
+    queryset = BookingJob.objects.filter(_claimable(now))
+    if pk is not None:
+        queryset = queryset.filter(pk=pk)
+    candidates = list(queryset.order_by('run_after').values_list('pk', flat=True)[:10])
+    for pk in candidates:
+        # Only one worker's UPDATE can still match; the others move on
+        claimed = BookingJob.objects.filter(_claimable(now), pk=pk).update(
+            status=BookingJob.RUNNING, locked_at=now, attempts=F('attempts') + 1)
+        if claimed:
+            return BookingJob.objects.select_related('user', 'flight__user').get(pk=pk)
+    return None
+
+
+def is_retryable(error):
+    """Whether a failed attempt may be tried again.
+
+    Transient errors from the token and pricing calls are, as is a 429 for
+    the order request, which Amadeus rejected without placing anything.
+    ``OrderOutcomeUnknown`` never is.
+    """
+    if isinstance(error, (LimitExceeded, NetworkError, ServerError, requests.exceptions.ConnectionError)):
+        return True
+    if isinstance(error, ClientError):
+        return error.response.status_code == 429
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code == 429
+    return False
+
+
+def retry_delay(attempts):
+    return backoff_delay(attempts, getattr(settings, 'BOOKING_RETRY_BASE_DELAY', 5),
+                         getattr(settings, 'BOOKING_RETRY_MAX_DELAY', 300))
+
+
+def run_job(job, book, notify):
+    """Run a claimed job.
+
+    ``book(job)`` places the order and returns the booking details to keep;
+    it raises ``OrderOutcomeUnknown`` when the order request may have gone
+    through. ``notify(job)`` is called once the job has succeeded, finally
+    failed or been sent for review; it runs after the outcome is saved, so
+    a failing email never causes the flight to be booked again.
+    """
+    try:
+        result = book(job)
+    except Exception as error:
+        job.last_error = f'{type(error).__name__}: {error}'
+        job.locked_at = None
+        if isinstance(error, OrderOutcomeUnknown):
+            logger.error(f"Booking job {job.pk} needs review, the order may have been placed: {error}")
+            job.status = BookingJob.REVIEW
+            job.save(update_fields=['status', 'locked_at', 'last_error', 'updated_at'])
+        elif is_retryable(error) and job.attempts < getattr(settings, 'BOOKING_MAX_ATTEMPTS', 5):
+            delay = retry_delay(job.attempts)
+            logger.warning(f"Booking job {job.pk} attempt {job.attempts} failed, retrying in {delay:.0f}s: {error}")
+            job.status = BookingJob.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+            # Only a rejected (429) order request gets here, so nothing was placed
+            job.order_sent_at = None
+            job.save(update_fields=['status', 'run_after', 'order_sent_at', 'locked_at', 'last_error', 'updated_at'])
+            return job
+        else:
+            logger.error(f"Booking job {job.pk} failed after {job.attempts} attempts: {error}")
+            job.status = BookingJob.FAILED
+            job.save(update_fields=['status', 'locked_at', 'last_error', 'updated_at'])
+    else:
+        job.status = BookingJob.SUCCEEDED
+        job.result = result
+        job.locked_at = None
+        job.save(update_fields=['status', 'result', 'locked_at', 'updated_at'])
+
+    try:
+        notify(job)
+    except Exception as error:
+        logger.exception(f"Notification for booking job {job.pk} failed: {error}")
+    return job
+
+
+def run_inline(job, book, notify):
+    """Run ``job`` in the current request when ``BOOKING_INLINE`` is set and
+    it is due; otherwise, or when a worker already has it, return it as is.
+
+    The status page calls this on every poll, so an attempt that failed
+    with a retryable error is tried again once its backoff has passed.
+    """
+    if not getattr(settings, 'BOOKING_INLINE', False):
+        return job
+    claimed = claim_job(job.pk)
+    if claimed is None:
+        return job
+    return run_job(claimed, book, notify)
@@ -0,0 +1,66 @@
+"""ISO-8601 duration and timestamp helpers for Amadeus payloads.
+
+Amadeus sends durations such as ``PT7H35M`` or ``P1DT2H`` and local
+timestamps such as ``2026-11-02T21:49:00``. The same values repeat across
+the offers of one search, so parsing is memoized.
+"""
+import re
+from datetime import datetime
+from functools import lru_cache
+
+DURATION_RE = re.compile(
+    r'^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$'
+)
+
+
+@lru_cache(maxsize=4096)
+def duration_minutes(duration):
+    """Whole minutes in an ISO-8601 duration, 0 if it cannot be parsed."""
+    match = DURATION_RE.match(duration or '')
+    if match is None:
+        return 0
+    days, hours, minutes, _ = match.groups()
+    return int(days or 0) * 1440 + int(hours or 0) * 60 + int(minutes or 0)
+
+
+@lru_cache(maxsize=8192)
+def parse_timestamp(timestamp):
+    return datetime.fromisoformat(timestamp[0:19])
+
+
+def clock_time(timestamp):
+    # "2026-11-02T21:49:00" -> "21:49"
+    return timestamp[11:16]
+
+
+def date_part(timestamp):
+    return timestamp.split('T', 1)[0]
+
+
+def minutes_between(start, end):
+    """Minutes from timestamp ``start`` to ``end``; both local to one airport."""
+    return int((parse_timestamp(end) - parse_timestamp(start)).total_seconds()) // 60
+
+
+def format_minutes(minutes):
+    return f'{minutes // 60}:{minutes % 60:02d}'
+
+
+@lru_cache(maxsize=4096)
+def format_duration(duration):
+    """Display form used on the results page, e.g. ``P1DT2H5M`` -> ``26H5M``."""
+    minutes = duration_minutes(duration)
+    hours, minutes = divmod(minutes, 60)
+    if hours and minutes:
+        return f'{hours}H{minutes}M'
+    if hours:
+        return f'{hours}H'
+    return f'{minutes}M'
+
+
+def layover_minutes(segments):
+    """Connection time at each stop of an itinerary's raw segments."""
+    return [
+        minutes_between(before['arrival']['at'], after['departure']['at'])
+        for before, after in zip(segments, segments[1:])
+    ]
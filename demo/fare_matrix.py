@@ -0,0 +1,59 @@
+"""Cheapest fare per departure/return date pair around a requested trip.
+
+Each cell is an ordinary flight offers search, cached under the same key as
+a normal search, so cells are shared with regular searches in both
+directions. Only the cheapest price of each cell is kept for the matrix.
+"""
+from datetime import date, timedelta
+
+from .flight import display_price
+
+
+def date_grid(departure_date, return_date=None, days=3, today=None):
+    """``(departure, return)`` ISO date pairs within ``days`` of the requested
+    dates, skipping past departures and returns before departure."""
+    today = today or date.today()
+    departure = date.fromisoformat(departure_date)
+    offsets = range(-days, days + 1)
+    departures = [departure + timedelta(days=offset) for offset in offsets]
+    departures = [d for d in departures if d >= today]
+    if not return_date:
+        return [(d.isoformat(), None) for d in departures]
+
+    returning = date.fromisoformat(return_date)
+    returns = [returning + timedelta(days=offset) for offset in offsets]
+    return [(d.isoformat(), r.isoformat()) for d in departures for r in returns if r >= d]
+
+
+def cheapest_price(raw_offers, increment_value=0):
+    # Reads only the price of each offer; unreadable offers are skipped
+    prices = []
+    for raw in raw_offers or []:
+        try:
+            prices.append(display_price(raw, increment_value))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return min(prices) if prices else None
+
+
+def build_matrix(cells):
+    """Lay out ``{(departure, return): price}`` as table rows.
+
+    Rows are departure dates and columns return dates (a single column for
+    one-way trips). Cells with no fare, or whose search failed, are None.
+    """
+    departures = sorted({departure for departure, _ in cells})
+    returns = sorted({returning for _, returning in cells if returning}) or [None]
+    priced = [price for price in cells.values() if price is not None]
+    cheapest = min(priced) if priced else None
+    rows = [{
+        'departure': departure,
+        'cells': [{
+            'departure': departure,
+            'return': returning,
+            'price': cells.get((departure, returning)),
+            'searched': (departure, returning) in cells,
+            'cheapest': cheapest is not None and cells.get((departure, returning)) == cheapest,
+        } for returning in returns],
+    } for departure in departures]
+    return {'returns': returns, 'rows': rows, 'cheapest': cheapest}
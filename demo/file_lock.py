@@ -0,0 +1,26 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: callers fall back to their per-process locks
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """Holds an exclusive ``flock`` on ``path`` across processes on one host.
+
+    The file and its directory are created if missing. Where ``fcntl`` is not
+    available this does nothing, leaving only the caller's in-process lock.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -1,100 +1,107 @@
-import re
-from datetime import datetime
-
-from .models import PriceIncrement
-
-class Flight:
-    def __init__(self, flight):
-        self.flight = flight
-
-    def construct_flights(self):
-        # Get the price increment from the model
-        increment = PriceIncrement.objects.first()  # assuming only one record exists
-
-        if not increment:
-            increment_value = 0  # Default value if no increment is set
-        else:
-            increment_value = increment.increment_value 
-
-        offer = {}
-        index = 0
-        offer['price'] = float(self.flight['price']['total']) * 1600 + increment_value  # Increment price dynamically
-        offer['id'] = self.flight['id']
-
-        for f in self.flight['itineraries']:
-            # Keys starting from 0 correspond to Outbound flights and the keys starting from 1 to Return flights
-            if len(self.flight['itineraries'][index]['segments']) == 2:  # One-stop flight
-                offer[str(index) + 'firstFlightDepartureAirport'] = self.flight['itineraries'][index]['segments'][0]['departure']['iataCode']
-                offer[str(index) + 'firstFlightAirlineLogo'] = get_airline_logo(self.flight['itineraries'][index]['segments'][0]['carrierCode'])
-                offer[str(index) + 'firstFlightAirline'] = self.flight['itineraries'][index]['segments'][0]['carrierCode']
-                offer[str(index) + 'firstFlightDepartureDate'] = get_hour(self.flight['itineraries'][index]['segments'][0]['departure']['at'])
-                offer[str(index) + 'firstFlightArrivalAirport'] = self.flight['itineraries'][index]['segments'][0]['arrival']['iataCode']
-                offer[str(index) + 'firstFlightArrivalDate'] = get_hour(self.flight['itineraries'][index]['segments'][0]['arrival']['at'])
-                offer[str(index) + 'firstFlightArrivalDuration'] = self.flight['itineraries'][index]['segments'][0]['duration']
-                offer[str(index) + 'secondFlightDepartureAirport'] = self.flight['itineraries'][index]['segments'][1]['departure']['iataCode']
-                offer[str(index) + 'secondFlightDepartureDate'] = get_hour(self.flight['itineraries'][index]['segments'][1]['departure']['at'])
-                offer[str(index) + 'secondFlightAirlineLogo'] = get_airline_logo(self.flight['itineraries'][index]['segments'][1]['carrierCode'])
-                offer[str(index) + 'secondFlightAirline'] = self.flight['itineraries'][index]['segments'][1]['carrierCode']
-                offer[str(index) + 'secondFlightArrivalAirport'] = self.flight['itineraries'][index]['segments'][1]['arrival']['iataCode']
-                offer[str(index) + 'secondFlightArrivalDate'] = get_hour(self.flight['itineraries'][index]['segments'][1]['arrival']['at'])
-                offer[str(index) + 'secondFlightArrivalDuration'] = self.flight['itineraries'][index]['segments'][1]['duration']
-                offer[str(index) + 'FlightTotalDuration'] = self.flight['itineraries'][index]['duration'][2:]
-                offer[str(index) + 'stop_time'] = get_stoptime(self.flight['itineraries'][index]['duration'],
-                                                               offer[str(index) + 'firstFlightArrivalDuration'],
-                                                               offer[str(index) + 'secondFlightArrivalDuration'])
-
-            elif len(self.flight['itineraries'][index]['segments']) == 1:  # Direct flight
-                offer[str(index) + 'firstFlightDepartureAirport'] = self.flight['itineraries'][index]['segments'][0]['departure']['iataCode']
-                offer[str(index) + 'firstFlightAirlineLogo'] = get_airline_logo(self.flight['itineraries'][index]['segments'][0]['carrierCode'])
-                offer[str(index) + 'firstFlightAirline'] = self.flight['itineraries'][index]['segments'][0]['carrierCode']
-                offer[str(index) + 'firstFlightDepartureDate'] = get_hour(self.flight['itineraries'][index]['segments'][0]['departure']['at'])
-                offer[str(index) + 'firstFlightArrivalAirport'] = self.flight['itineraries'][index]['segments'][0]['arrival']['iataCode']
-                offer[str(index) + 'firstFlightArrivalDate'] = get_hour(self.flight['itineraries'][index]['segments'][0]['arrival']['at'])
-                offer[str(index) + 'firstFlightArrivalDuration'] = self.flight['itineraries'][index]['segments'][0]['duration']
-                offer[str(index) + 'FlightTotalDuration'] = self.flight['itineraries'][index]['duration'][2:]
-
-            index += 1
-
-        return offer
+from .durations import clock_time, format_duration, format_minutes, layover_minutes
+
+# Amadeus prices are quoted in EUR; results are shown in Naira
+NAIRA_RATE = 1600
+
+
+def display_price(raw, increment_value=0):
+    # Price shown to staff for a raw Amadeus offer
+    return float(raw['price']['total']) * NAIRA_RATE + increment_value
+
+
+class Segment:
+    __slots__ = (
+        'departure_airport', 'departure_at', 'departure_time',
+        'arrival_airport', 'arrival_at', 'arrival_time',
+        'carrier', 'carrier_logo', 'duration',
+    )
+
+    def __init__(self, raw):
+        departure = raw['departure']
+        arrival = raw['arrival']
+        self.departure_airport = departure['iataCode']
+        self.departure_at = departure['at']
+        self.departure_time = clock_time(departure['at'])
+        self.arrival_airport = arrival['iataCode']
+        self.arrival_at = arrival['at']
+        self.arrival_time = clock_time(arrival['at'])
+        self.carrier = raw['carrierCode']
+        self.carrier_logo = get_airline_logo(raw['carrierCode'])
+        self.duration = raw.get('duration', '')
+
+
+class Itinerary:
+    __slots__ = ('segments', 'duration', 'layover_minutes')
+
+    def __init__(self, raw):
+        self.segments = [Segment(segment) for segment in raw['segments']]
+        self.duration = format_duration(raw.get('duration', ''))
+        # Computed from the timestamps, which also covers multi-day journeys
+        self.layover_minutes = layover_minutes(raw['segments'])
+
+    @property
+    def stops(self):
+        return len(self.segments) - 1
+
+    @property
+    def stop_time(self):
+        return format_minutes(sum(self.layover_minutes))
+
+    @property
+    def first_segment(self):
+        return self.segments[0]
+
+    @property
+    def last_segment(self):
+        return self.segments[-1]
+
+
+class Offer:
+    __slots__ = ('id', 'offer_id', 'price', 'itineraries', 'cabins', 'seats', 'raw')
+
+    def __init__(self, raw, increment_value=0):
+        self.raw = raw
+        self.id = raw['id']
+        self.offer_id = None
+        self.price = display_price(raw, increment_value)
+        self.itineraries = [Itinerary(itinerary) for itinerary in raw['itineraries']]
+        self.cabins = sorted({fare['cabin'] for pricing in raw.get('travelerPricings', [])
+                              for fare in pricing.get('fareDetailsBySegment', []) if fare.get('cabin')})
+        self.seats = raw.get('numberOfBookableSeats')
+
+    # Read by the results page filters, so the raw offer need not be sent along
+    @property
+    def carriers(self):
+        return sorted({segment.carrier for itinerary in self.itineraries for segment in itinerary.segments})
+
+    @property
+    def max_segments(self):
+        return max(len(itinerary.segments) for itinerary in self.itineraries)
+
+    @property
+    def outbound(self):
+        return self.itineraries[0]
+
+    @property
+    def inbound(self):
+        # Round trips have a second itinerary for the way back
+        return self.itineraries[1] if len(self.itineraries) > 1 else None
+
+
+def parse_offers(raw_offers, increment_value=0):
+    """Parse a whole flight offers response in one pass.
+
+    Offers Amadeus returns in a shape we cannot read are skipped rather than
+    failing the whole result set.
+    """
+    offers = []
+    for raw in raw_offers:
+        try:
+            offers.append(Offer(raw, increment_value))
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+    return offers
 
 
 def get_airline_logo(carrier_code):
     return "https://s1.apideeplink.com/images/airlines/" + carrier_code + ".png"
-
-
-def get_hour(date_time):
-    return datetime.strptime(date_time[0:19], "%Y-%m-%dT%H:%M:%S").strftime("%H:%M")
-
-
-def get_stoptime(total_duration, first_flight_duration, second_flight_duration):
-    if re.search('PT(.*)H', total_duration) is None:
-        total_duration_hours = 0
-    else:
-        total_duration_hours = int(re.search('PT(.*)H', total_duration).group(1))
-    if re.search('H(.*)M', total_duration) is None:
-        total_duration_minutes = 0
-    else:
-        total_duration_minutes = int(re.search('H(.*)M', total_duration).group(1))
-
-    if re.search('PT(.*)H', first_flight_duration) is None:
-        first_flight_hours = 0
-    else:
-        first_flight_hours = int(re.search('PT(.*)H', first_flight_duration).group(1))
-    if re.search('H(.*)M', first_flight_duration) is None:
-        first_flight_minutes = 0
-    else:
-        first_flight_minutes = int(re.search('H(.*)M', first_flight_duration).group(1))
-
-    if re.search('PT(.*)H', second_flight_duration) is None:
-        second_flight_hours = 0
-    else:
-        second_flight_hours = int(re.search('PT(.*)H', second_flight_duration).group(1))
-    if re.search('H(.*)M', second_flight_duration) is None:
-        second_flight_minutes = 0
-    else:
-        second_flight_minutes = int(re.search('H(.*)M', second_flight_duration).group(1))
-
-    connection_minutes = (total_duration_hours*60 + total_duration_minutes) - (first_flight_hours*60 + first_flight_minutes + second_flight_hours*60 + second_flight_minutes)
-    hours = connection_minutes // 60
-    minutes = connection_minutes % 60
-    return f'{hours}:{minutes:02d}'
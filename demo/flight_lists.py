@@ -0,0 +1,85 @@
+"""Keyset-paginated flight request lists for the staff pages.
+
+Pages are cut with a ``(departure_date, id)`` cursor instead of OFFSET, so
+every page is one range scan of the ``flight_user_status`` index no matter
+how far back it is. Totals are cached per user and status.
+"""
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, Value
+
+from .models import Flight_model
+
+
+def user_flights(user, approved):
+    # Compared as a value: Django renders approved=False as NOT "approved",
+    # which SQLite cannot match against the flight_user_status index
+    return Flight_model.objects.filter(user=user, approved=Value(approved))
+
+
+def _count_key(user_id, approved):
+    return f'flight_count:{user_id}:{int(approved)}'
+
+
+def flight_count(user, approved):
+    """Number of the user's flight requests with this approval status."""
+    key = _count_key(user.pk, approved)
+    count = cache.get(key)
+    if count is None:
+        count = user_flights(user, approved).count()
+        cache.set(key, count, getattr(settings, 'FLIGHT_LIST_COUNT_TTL', 300))
+    return count
+
+
+def invalidate_flight_counts(user_ids):
+    cache.delete_many([_count_key(user_id, approved) for user_id in set(user_ids) for approved in (False, True)])
+
+
+def encode_cursor(flight):
+    return f'{flight.departure_date.isoformat()}_{flight.pk}'
+
+
+def decode_cursor(cursor):
+    # A malformed cursor just means the first page
+    try:
+        departure_date, pk = cursor.split('_')
+        return datetime.date.fromisoformat(departure_date), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_page(queryset, after=None, before=None, page_size=25):
+    """One page of ``queryset`` in ``-departure_date, -id`` order.
+
+    ``after`` gives the page following that cursor (older departures),
+    ``before`` the one preceding it. Returns ``(flights, newer, older)``,
+    where ``newer``/``older`` are the cursors to pass back as ``before``/
+    ``after`` for the neighbouring pages, or None at either end.
+    """
+    before = decode_cursor(before)
+    after = decode_cursor(after)
+    if before:
+        departure_date, pk = before
+        rows = list(queryset.filter(Q(departure_date__gt=departure_date)
+                                    | Q(departure_date=departure_date, pk__gt=pk))
+                    .order_by('departure_date', 'pk')[:page_size + 1])
+        has_newer = len(rows) > page_size
+        flights = rows[:page_size][::-1]
+        has_older = True
+    else:
+        if after:
+            departure_date, pk = after
+            queryset = queryset.filter(Q(departure_date__lt=departure_date)
+                                       | Q(departure_date=departure_date, pk__lt=pk))
+        rows = list(queryset.order_by('-departure_date', '-pk')[:page_size + 1])
+        has_older = len(rows) > page_size
+        flights = rows[:page_size]
+        has_newer = after is not None
+
+    if not flights:
+        return flights, None, None
+    return (flights,
+            encode_cursor(flights[0]) if has_newer else None,
+            encode_cursor(flights[-1]) if has_older else None)
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
+
+import geocoder
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import GeocodedAddress
+
+logger = logging.getLogger(__name__)
+
+# 4 decimal places is roughly 11m, close enough to share an address
+PRECISION = Decimal('0.0001')
+
+# Separate, small pool so Nominatim never sees more than a few calls at once
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'GEOCODE_MAX_WORKERS', 4),
+    thread_name_prefix='geocode',
+)
+
+_pending = {}
+_pending_lock = threading.Lock()
+
+_next_call_at = 0.0
+_throttle_lock = threading.Lock()
+
+
+def geocode_key(latitude, longitude):
+    try:
+        return (
+            Decimal(str(latitude)).quantize(PRECISION, rounding=ROUND_HALF_UP),
+            Decimal(str(longitude)).quantize(PRECISION, rounding=ROUND_HALF_UP),
+        )
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def format_address(result):
+    street = result.get('street')
+    if not street:
+        return ''
+    house_number = result.get('houseNumber') or result.get('housenumber')
+    if house_number is not None:
+        return street + ' ' + house_number
+    return street
+
+
+def _throttle():
+    # Nominatim's usage policy allows one request per second; calls from all
+    # pool threads are spaced out by GEOCODE_MIN_INTERVAL
+    global _next_call_at
+    with _throttle_lock:
+        now = time.monotonic()
+        wait_for = _next_call_at - now
+        _next_call_at = max(now, _next_call_at) + getattr(settings, 'GEOCODE_MIN_INTERVAL', 1.0)
+    if wait_for > 0:
+        time.sleep(wait_for)
+
+
+def _reverse_geocode(key):
+    try:
+        _throttle()
+        response = geocoder.osm(
+            [float(key[0]), float(key[1])],
+            method='reverse',
+            timeout=getattr(settings, 'GEOCODE_TIMEOUT', 3),
+        )
+        if not response.ok:
+            # geocoder reports HTTP errors and timeouts here instead of raising;
+            # nothing is stored, so the next search tries again
+            logger.warning(f"Reverse geocoding failed for {key}: {response.status}")
+            return ''
+        address = format_address(response.json or {})
+        # A point without a street is stored too, but only trusted for
+        # GEOCODE_BLANK_TTL seconds (see reverse_geocode_many)
+        GeocodedAddress.objects.update_or_create(
+            latitude=key[0], longitude=key[1], defaults={'address': address})
+        return address
+    except Exception as error:
+        logger.warning(f"Reverse geocoding failed for {key}: {error}")
+        return ''
+    finally:
+        with _pending_lock:
+            _pending.pop(key, None)
+        # Worker threads hold their own DB connection
+        connection.close()
+
+
+def _schedule(key):
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = executor.submit(_reverse_geocode, key)
+            _pending[key] = future
+        return future
+
+
+class AddressPage:
+    """Addresses for the cards of one results page, possibly rendered in
+    several parts.
+
+    The whole page waits at most ``GEOCODE_WAIT`` seconds for lookups, however
+    many parts it has, and starts at most ``GEOCODE_MAX_LOOKUPS`` of them, for
+    the cards it shows first. Addresses not back in time come back as ``''``
+    and are saved once they finish, so the next search has them.
+    """
+
+    def __init__(self, wait=None, max_lookups=None):
+        wait = getattr(settings, 'GEOCODE_WAIT', 2) if wait is None else wait
+        self.deadline = time.monotonic() + wait
+        self.lookups_left = getattr(settings, 'GEOCODE_MAX_LOOKUPS', 20) if max_lookups is None else max_lookups
+
+    def addresses(self, coordinates):
+        """Return an address for each ``(latitude, longitude)`` pair."""
+        keys = [geocode_key(lat, lng) for lat, lng in coordinates]
+        wanted = {key for key in keys if key is not None}
+        if not wanted:
+            return ['' for _ in keys]
+
+        known = {}
+        blank_since = timezone.now() - timedelta(seconds=getattr(settings, 'GEOCODE_BLANK_TTL', 3600))
+        rows = GeocodedAddress.objects.filter(
+            latitude__in={key[0] for key in wanted},
+            longitude__in={key[1] for key in wanted},
+        ).exclude(address='', updated_at__lt=blank_since).values_list('latitude', 'longitude', 'address')
+        for latitude, longitude, address in rows:
+            known[(latitude, longitude)] = address
+
+        # In page order, so the cards at the top are looked up first
+        missing = list(dict.fromkeys(key for key in keys if key is not None and key not in known))
+        missing = missing[:max(0, self.lookups_left)]
+        self.lookups_left -= len(missing)
+        futures = {key: _schedule(key) for key in missing}
+        if futures:
+            wait(futures.values(), timeout=max(0, self.deadline - time.monotonic()))
+            for key, future in futures.items():
+                if future.done():
+                    known[key] = future.result()
+
+        return [known.get(key, '') if key is not None else '' for key in keys]
+
+
+def reverse_geocode_many(coordinates):
+    """Return an address for each ``(latitude, longitude)`` pair, as one
+    ``AddressPage``."""
+    return AddressPage().addresses(coordinates)
@@ -0,0 +1,72 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import CityHotelList
+from .workers import submit
+
+logger = logging.getLogger(__name__)
+
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def save_city_hotel_ids(city_code, hotel_ids):
+    CityHotelList.objects.update_or_create(
+        city_code=city_code.upper(), defaults={'hotel_ids': hotel_ids, 'fetched_at': timezone.now()})
+
+
+def _refresh(city_code, fetch_hotel_ids):
+    try:
+        save_city_hotel_ids(city_code, fetch_hotel_ids(city_code))
+    except Exception as error:
+        # The stale list keeps being served; the next search will retry
+        logger.warning(f"Refreshing hotel list for {city_code} failed: {error}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(city_code)
+        # Worker threads hold their own DB connection
+        connection.close()
+
+
+def _refresh_in_background(city_code, fetch_hotel_ids):
+    with _refreshing_lock:
+        if city_code in _refreshing:
+            return
+        _refreshing.add(city_code)
+    submit(_refresh, city_code, fetch_hotel_ids)
+
+
+def cached_city_hotel_ids(city_code, fetch_hotel_ids):
+    """Return the catalogued hotel ids for ``city_code``, or None if the city
+    has never been fetched.
+
+    Lists older than ``CITY_HOTEL_LIST_TTL`` seconds are still returned, and
+    a refresh with ``fetch_hotel_ids(city_code)`` is started in the background.
+    """
+    city_code = city_code.upper()
+    cached = CityHotelList.objects.filter(city_code=city_code).first()
+    if cached is None:
+        return None
+
+    max_age = timedelta(seconds=getattr(settings, 'CITY_HOTEL_LIST_TTL', 7 * 24 * 3600))
+    if timezone.now() - cached.fetched_at > max_age:
+        _refresh_in_background(city_code, fetch_hotel_ids)
+    return cached.hotel_ids
+
+
+def get_city_hotel_ids(city_code, fetch_hotel_ids):
+    """Return the hotel ids for ``city_code`` from the local catalogue.
+
+    ``fetch_hotel_ids(city_code)`` is only called when the city has never been
+    fetched.
+    """
+    hotel_ids = cached_city_hotel_ids(city_code, fetch_hotel_ids)
+    if hotel_ids is None:
+        hotel_ids = fetch_hotel_ids(city_code.upper())
+        save_city_hotel_ids(city_code, hotel_ids)
+    return hotel_ids
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+
+def amadeus_url(path):
+    if settings.AMADEUS_HOSTNAME == 'production':
+        return "https://api.amadeus.com" + path
+    return "https://test.api.amadeus.com" + path
+
+
+class HttpClient:
+    """Keep-alive HTTP client shared by every direct REST call in a process.
+
+    Connections are pooled per host by a single ``requests.Session`` so
+    repeated calls to the same API skip the TCP and TLS handshakes. Every
+    request gets a (connect, read) timeout unless the caller passes one.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, connect_timeout=5, read_timeout=30):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = (connect_timeout, read_timeout)
+        self._session = None
+        self._pid = None
+        self._adapters = {}
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(lambda: {
+            'requests': 0,
+            'errors': 0,
+            'in_flight': 0,
+            'peak_in_flight': 0,
+            'total_seconds': 0.0,
+        })
+
+    @property
+    def session(self):
+        # Sockets must not be shared with a parent process after a fork
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        for prefix, adapter_factory in self._adapters.items():
+            session.mount(prefix, adapter_factory())
+        return session
+
+    def mount(self, prefix, adapter_factory):
+        # Adapters are built per session, so pass a factory rather than an instance
+        with self._lock:
+            self._adapters[prefix] = adapter_factory
+            self._session = None
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+        with self._lock:
+            metrics = self._metrics[host]
+            metrics['requests'] += 1
+            metrics['in_flight'] += 1
+            metrics['peak_in_flight'] = max(metrics['peak_in_flight'], metrics['in_flight'])
+        started_at = time.monotonic()
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                metrics['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                metrics['in_flight'] -= 1
+                metrics['total_seconds'] += time.monotonic() - started_at
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def stats(self):
+        open_connections = {}
+        if self._session is not None:
+            adapter = self._session.get_adapter('https://')
+            for key in list(adapter.poolmanager.pools.keys()):
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    # The pool queue holds idle connections plus None placeholders
+                    queued = list(pool.pool.queue) if pool.pool is not None else []
+                    open_connections[key.key_host] = {
+                        'created': pool.num_connections,
+                        'idle': sum(1 for conn in queued if conn is not None),
+                    }
+
+        with self._lock:
+            hosts = {}
+            for host, metrics in self._metrics.items():
+                hosts[host] = dict(metrics)
+                hosts[host]['pool_utilization'] = round(metrics['in_flight'] / self.pool_maxsize, 2)
+                hosts[host]['avg_seconds'] = round(metrics['total_seconds'] / metrics['requests'], 4) if metrics['requests'] else 0
+                hosts[host]['connections'] = open_connections.get(host.split(':')[0], {})
+        return {'pool_maxsize': self.pool_maxsize, 'hosts': hosts}
+
+
+http_client = HttpClient(
+    pool_connections=getattr(settings, 'HTTP_POOL_CONNECTIONS', 10),
+    pool_maxsize=getattr(settings, 'HTTP_POOL_MAXSIZE', 10),
+    connect_timeout=getattr(settings, 'HTTP_CONNECT_TIMEOUT', 5),
+    read_timeout=getattr(settings, 'HTTP_READ_TIMEOUT', 30),
+)
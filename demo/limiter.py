@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from urllib.error import HTTPError, URLError
+
+from django.conf import settings
+
+
+class LimitExceeded(Exception):
+    """Raised instead of starting an upstream call when the limiter is full."""
+
+
+class _BufferedResponse:
+    # An urlopen response with its body already read
+    def __init__(self, response):
+        self._response = response
+        self._body = response.read()
+
+    def read(self):
+        return self._body
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for outbound calls in this process.
+
+    Each call that comes back within ``latency_target`` seconds while the
+    limit was in use raises the limit by ``1 / limit`` (about +1 per round of
+    calls). A slow call, a timeout, a 429 or a 5xx multiplies it by
+    ``backoff``, at most once per round. Callers over the limit wait up to
+    ``queue_timeout`` seconds for a slot, and at most ``max_queue`` of them
+    wait at once; the rest get ``LimitExceeded`` straight away so the worker
+    is free to serve other pages.
+    """
+
+    def __init__(self, initial_limit=8, min_limit=2, max_limit=32, latency_target=4.0,
+                 backoff=0.7, queue_timeout=0.5, max_queue=16):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._last_decrease = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Take a slot and return its start time, or raise ``LimitExceeded``."""
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                if self.queued >= self.max_queue:
+                    self.rejected += 1
+                    raise LimitExceeded(f"{self.in_flight} upstream calls in flight, queue full")
+                self.queued += 1
+                try:
+                    deadline = time.monotonic() + self.queue_timeout
+                    while self.in_flight >= int(self.limit):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.rejected += 1
+                            raise LimitExceeded(f"No upstream slot free within {self.queue_timeout}s")
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+            self.in_flight += 1
+            return time.monotonic()
+
+    async def acquire_async(self):
+        """``acquire`` for coroutines: waits without blocking the event loop."""
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return time.monotonic()
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise LimitExceeded(f"{self.in_flight} upstream calls in flight, queue full")
+            self.queued += 1
+        try:
+            deadline = time.monotonic() + self.queue_timeout
+            while True:
+                await asyncio.sleep(0.01)
+                with self._cond:
+                    if self.in_flight < int(self.limit):
+                        self.in_flight += 1
+                        return time.monotonic()
+                    if time.monotonic() >= deadline:
+                        self.rejected += 1
+                        raise LimitExceeded(f"No upstream slot free within {self.queue_timeout}s")
+        finally:
+            with self._cond:
+                self.queued -= 1
+
+    def release(self, started_at, overloaded=False):
+        latency = time.monotonic() - started_at
+        with self._cond:
+            was_saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if overloaded or latency > self.latency_target:
+                # Calls started before the last decrease were sent under the
+                # old limit; letting them all back off again would collapse it
+                if started_at > self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+            elif was_saturated:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify()
+
+    def wrap(self, http):
+        """Wrap an ``urlopen``-style callable so every call takes a slot."""
+        def limited(request, *args, **kwargs):
+            started_at = self.acquire()
+            overloaded = False
+            try:
+                # The body is read inside the slot too, so a timeout while
+                # reading it is caught here rather than in the SDK's parser
+                return _BufferedResponse(http(request, *args, **kwargs))
+            except HTTPError as error:
+                overloaded = error.code == 429 or error.code >= 500
+                raise
+            except URLError:
+                overloaded = True
+                raise
+            except OSError as error:
+                # Timeouts (socket.timeout) and resets are not URLErrors, so
+                # the SDK would let them escape; as a URLError they become a
+                # NetworkError, which the views handle like any ResponseError
+                overloaded = True
+                raise URLError(error) from error
+            finally:
+                self.release(started_at, overloaded)
+        return limited
+
+    def stats(self):
+        with self._cond:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'rejected': self.rejected,
+                'decreases': self.decreases,
+                'latency_target': self.latency_target,
+            }
+
+
+amadeus_limiter = AdaptiveLimiter(
+    initial_limit=getattr(settings, 'AMADEUS_LIMIT_INITIAL', 8),
+    min_limit=getattr(settings, 'AMADEUS_LIMIT_MIN', 2),
+    max_limit=getattr(settings, 'AMADEUS_LIMIT_MAX', 32),
+    latency_target=getattr(settings, 'AMADEUS_LATENCY_TARGET', 4.0),
+    queue_timeout=getattr(settings, 'AMADEUS_QUEUE_TIMEOUT', 0.5),
+    max_queue=getattr(settings, 'AMADEUS_MAX_QUEUE', 16),
+)
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from demo import durations
+from demo.bench.legacy import get_hour, get_stoptime
+from demo.bench.payloads import flight_offers
+
+
+def best_of(repeat, func, before=None):
+    timings = []
+    for _ in range(repeat):
+        if before:
+            before()
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def clear_caches():
+    durations.duration_minutes.cache_clear()
+    durations.parse_timestamp.cache_clear()
+    durations.format_duration.cache_clear()
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark the ISO-8601 duration/timestamp helpers against the legacy regex/strptime ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=250, help='Offers in the synthetic response')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per implementation; the best one is reported')
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        itineraries = [itinerary for offer in flight_offers(count=options['offers']) for itinerary in offer['itineraries']]
+        timestamps = [segment[side]['at'] for itinerary in itineraries
+                      for segment in itinerary['segments'] for side in ('departure', 'arrival')]
+        # The legacy layover helper only understands one-stop itineraries
+        one_stop = [itinerary for itinerary in itineraries if len(itinerary['segments']) == 2]
+
+        def legacy_layovers():
+            for itinerary in one_stop:
+                first, second = itinerary['segments']
+                get_stoptime(itinerary['duration'], first['duration'], second['duration'])
+
+        def new_layovers():
+            for itinerary in one_stop:
+                durations.format_minutes(sum(durations.layover_minutes(itinerary['segments'])))
+
+        rows = [
+            ('clock time', len(timestamps),
+             best_of(repeat, lambda: [get_hour(at) for at in timestamps]),
+             best_of(repeat, lambda: [durations.clock_time(at) for at in timestamps], clear_caches),
+             best_of(repeat, lambda: [durations.clock_time(at) for at in timestamps])),
+            ('layover', len(one_stop),
+             best_of(repeat, legacy_layovers),
+             best_of(repeat, new_layovers, clear_caches),
+             best_of(repeat, new_layovers)),
+        ]
+
+        self.stdout.write(f'{len(itineraries)} itineraries, best of {repeat} runs (us per call)')
+        self.stdout.write(f'  {"":12} {"calls":>6} {"legacy":>9} {"cold":>9} {"warm":>9}')
+        for name, calls, legacy, cold, warm in rows:
+            self.stdout.write(f'  {name:12} {calls:6d} {legacy / calls * 1e6:9.2f} {cold / calls * 1e6:9.2f} {warm / calls * 1e6:9.2f}')
+
+        # Journeys over 24h are reported as P1DT..., which the legacy regexes misread
+        wrong = 0
+        for itinerary in one_stop:
+            first, second = itinerary['segments']
+            expected = durations.format_minutes(sum(durations.layover_minutes(itinerary['segments'])))
+            try:
+                if get_stoptime(itinerary['duration'], first['duration'], second['duration']) != expected:
+                    wrong += 1
+            except ValueError:
+                wrong += 1
+        self.stdout.write(f'  legacy layover wrong or failing on {wrong} of {len(one_stop)} one-stop itineraries')
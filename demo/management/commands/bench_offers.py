@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from demo.bench.legacy import legacy_construct_flights
+from demo.bench.payloads import flight_offers
+from demo.flight import parse_offers
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-offer parse cost of the legacy dict builder and demo.flight.parse_offers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offers', type=int, default=250, help='Offers in the synthetic response')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per implementation; the best one is reported')
+
+    def handle(self, *args, **options):
+        raw_offers = flight_offers(count=options['offers'])
+        count = len(raw_offers)
+
+        legacy = best_of(options['repeat'], lambda: [legacy_construct_flights(offer) for offer in raw_offers])
+        typed = best_of(options['repeat'], lambda: parse_offers(raw_offers))
+
+        self.stdout.write(f'{count} offers, best of {options["repeat"]} runs')
+        self.stdout.write(f'  legacy dict builder : {legacy * 1000:8.2f} ms total, {legacy / count * 1e6:7.1f} us/offer')
+        self.stdout.write(f'  parse_offers        : {typed * 1000:8.2f} ms total, {typed / count * 1e6:7.1f} us/offer')
+        self.stdout.write(f'  speedup             : {legacy / typed:.2f}x')
@@ -0,0 +1,121 @@
+import contextlib
+import io
+import json
+import os
+import platform
+import tempfile
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from demo.amadeus_replay import get_backend, fixture_store, faults
+from demo.bench.loadtest import SCENARIOS, APPROVE_BATCH, seed_fixtures, seed_database, run_scenario, check_overlap
+
+
+class Command(BaseCommand):
+    help = ('Load-test the booking tool views against the replayed Amadeus stand-in and report '
+            'p50/p95/p99 latency, throughput, DB queries and peak RSS per view. '
+            'Runs on a throwaway test database; needs AMADEUS_BACKEND=replay.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per view')
+        parser.add_argument('--concurrency', type=int, default=1, help='Client threads per view')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per view before timing')
+        parser.add_argument('--views', default=','.join(SCENARIOS),
+                            help='Comma-separated scenarios to run (default: all)')
+        parser.add_argument('--latency', type=float, help='Replayed Amadeus latency in seconds')
+        parser.add_argument('--error-rate', type=float, help='Share of replayed Amadeus calls that fail')
+        parser.add_argument('--offers', type=int, default=50, help='Flight offers in the seeded search response')
+        parser.add_argument('--rows', type=int, default=500, help='Flight rows seeded for the admin reports')
+        parser.add_argument('--fixtures', help='Replay recorded fixtures from this directory instead of seeding')
+        parser.add_argument('--output', default='loadtest.json', help='Where to write the JSON results')
+        parser.add_argument('--overlap', type=int, default=0, metavar='N',
+                            help='Also check that N concurrent async hotel searches overlap rather than '
+                                 'queue behind each other; fails if they take over 1.5x as long as one')
+
+    def handle(self, *args, **options):
+        if get_backend() != 'replay':
+            raise CommandError('Set AMADEUS_BACKEND=replay so the load test never reaches Amadeus.')
+        names = [name.strip() for name in options['views'].split(',') if name.strip()]
+        unknown = [name for name in names if name not in SCENARIOS]
+        if unknown:
+            raise CommandError(f"Unknown views: {', '.join(unknown)}. Choose from {', '.join(SCENARIOS)}.")
+
+        if options['latency'] is not None:
+            faults.latency = options['latency']
+        if options['error_rate'] is not None:
+            faults.error_rate = options['error_rate']
+
+        with tempfile.TemporaryDirectory(prefix='loadtest-') as workdir:
+            fixture_store.directory = options['fixtures'] or os.path.join(workdir, 'fixtures')
+            results, overlap = self.run(names, options, workdir)
+
+        report = {
+            'config': {
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'warmup': options['warmup'],
+                'replay_latency': faults.latency,
+                'replay_error_rate': faults.error_rate,
+                'offers': options['offers'],
+                'rows': options['rows'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'views': results,
+            'overlap': overlap,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(report, f, indent=2)
+
+        self.stdout.write(f"{'view':32} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'queries':>8} {'errors':>6} {'rss MB':>7}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:32} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['p99_ms']:8.1f} "
+                f"{result['throughput_rps']:8.1f} {result['queries_mean']:8.1f} {result['errors']:6d} "
+                f"{result['peak_rss_mb']:7.1f}")
+        if overlap:
+            self.stdout.write(f"Async overlap: {overlap['searches']} hotel searches took {overlap['together_ms']:.1f}ms "
+                              f"together, {overlap['alone_ms']:.1f}ms alone (ratio {overlap['ratio']})")
+        self.stdout.write(f"Results written to {options['output']}")
+        if overlap and overlap['ratio'] > 1.5:
+            raise CommandError('Concurrent async requests were serialized.')
+
+    def run(self, names, options, workdir):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            # A file rather than :memory: so client threads share one database
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(workdir, 'loadtest.sqlite3')
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            store = _NullStore() if options['fixtures'] else fixture_store
+            offers, hotels = seed_fixtures(store, options['offers'])
+            pending = (options['requests'] + options['warmup']) * APPROVE_BATCH if 'approve_flight' in names else 0
+            state = seed_database(offers, hotels, rows=options['rows'], pending=pending)
+
+            results = {}
+            for name in names:
+                self.stderr.write(f'Running {name}...')
+                # Views print progress to stdout; keep it out of the report
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = run_scenario(SCENARIOS[name], state, options['requests'],
+                                                 options['concurrency'], options['warmup'])
+            overlap = None
+            if options['overlap']:
+                self.stderr.write('Checking async overlap...')
+                with contextlib.redirect_stdout(io.StringIO()):
+                    overlap = check_overlap(state, options['overlap'])
+            return results, overlap
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+
+class _NullStore:
+    # Recorded fixtures are replayed as they are; the seeded payloads are
+    # still needed to build matching database rows
+    def save(self, *args, **kwargs):
+        pass
@@ -0,0 +1,42 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from demo.booking_jobs import claim_job, run_job
+from demo.views import place_flight_order, notify_booking
+
+
+class Command(BaseCommand):
+    help = ('Run queued flight bookings: price and order each offer with Amadeus, retrying '
+            'transient failures with backoff, and email the outcome. Run one or more of these '
+            'alongside the web workers.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the jobs that are due, then exit')
+        parser.add_argument('--poll-interval', type=float, default=settings.BOOKING_WORKER_POLL_INTERVAL,
+                            help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        # Finish the current booking before exiting on SIGTERM
+        signal.signal(signal.SIGTERM, self.stop)
+
+        processed = 0
+        while not self.stopping:
+            close_old_connections()
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+            job = run_job(job, place_flight_order, notify_booking)
+            processed += 1
+            self.stdout.write(f'Booking job {job.pk}: {job.status} (attempt {job.attempts})')
+        self.stdout.write(f'Processed {processed} booking jobs')
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,53 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from demo import outbox
+
+
+class Command(BaseCommand):
+    help = ('Deliver queued emails from the outbox in batches over one mail connection, '
+            'retrying failures with backoff and marking repeat failures dead.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send what is due, then exit')
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help='Messages sent per connection')
+        parser.add_argument('--poll-interval', type=float, default=settings.OUTBOX_POLL_INTERVAL,
+                            help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--requeue-dead', action='store_true',
+                            help='Give dead messages another round of attempts first')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        # Finish the current batch before exiting on SIGTERM
+        signal.signal(signal.SIGTERM, self.stop)
+
+        if options['requeue_dead']:
+            self.stdout.write(f'Requeued {outbox.requeue_dead()} dead messages')
+
+        retention = timedelta(seconds=settings.OUTBOX_SENT_RETENTION)
+        totals = [0, 0, 0]
+        while not self.stopping:
+            close_old_connections()
+            counts = outbox.drain(options['batch_size'], on_batch=self.report_batch)
+            totals = [total + count for total, count in zip(totals, counts)]
+            if options['once']:
+                break
+            if not any(counts):
+                # Idle: tidy up old sent rows, then wait for new mail
+                outbox.purge_sent(retention)
+                time.sleep(options['poll_interval'])
+        sent, retried, dead = totals
+        self.stdout.write(f'Sent {sent}, retrying {retried}, dead {dead}')
+
+    def report_batch(self, sent, retried, dead, seconds):
+        rate = (sent + retried + dead) / seconds if seconds else 0
+        self.stdout.write(f'Batch: sent {sent}, retrying {retried}, dead {dead} in {seconds:.2f}s ({rate:.1f} msg/s)')
+
+    def stop(self, signum, frame):
+        self.stopping = True
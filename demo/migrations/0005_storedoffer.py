@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-18 07:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0004_geocodedaddress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredOffer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offer_id', models.CharField(max_length=32, unique=True)),
+                ('payload', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stored_offers', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2 on 2026-10-18 07:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0005_storedoffer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityHotelList',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_code', models.CharField(max_length=3, unique=True)),
+                ('hotel_ids', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 07:29
+
+from django.db import migrations, models
+
+
+REQUEST_FIELDS = ('user_id', 'origin', 'destination', 'departure_date', 'return_date',
+                  'passenger_count', 'travel_class', 'price')
+
+
+def remove_duplicate_requests(apps, schema_editor):
+    # Keep one row per request, preferring an approved one, so the unique
+    # constraints below can be created
+    Flight_model = apps.get_model('demo', 'Flight_model')
+    seen = set()
+    duplicates = []
+    rows = Flight_model.objects.order_by('-approved', 'pk').values_list('pk', *REQUEST_FIELDS)
+    for pk, *request in rows.iterator():
+        key = tuple(request)
+        if key in seen:
+            duplicates.append(pk)
+        else:
+            seen.add(key)
+    for start in range(0, len(duplicates), 500):
+        Flight_model.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0006_cityhotellist'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_requests, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='flight_model',
+            index=models.Index(condition=models.Q(approved=True), fields=['origin', 'destination', 'departure_date', 'price'], name='approved_flight_match'),
+        ),
+        migrations.AddConstraint(
+            model_name='flight_model',
+            constraint=models.UniqueConstraint(fields=('user', 'origin', 'destination', 'departure_date', 'return_date', 'passenger_count', 'travel_class', 'price'), name='unique_flight_request'),
+        ),
+        migrations.AddConstraint(
+            model_name='flight_model',
+            constraint=models.UniqueConstraint(condition=models.Q(return_date__isnull=True), fields=('user', 'origin', 'destination', 'departure_date', 'passenger_count', 'travel_class', 'price'), name='unique_one_way_flight_request'),
+        ),
+    ]
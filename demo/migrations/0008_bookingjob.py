@@ -0,0 +1,42 @@
+# Generated by Django 3.2 on 2026-10-18 07:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0007_flight_model_unique_request'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offer_id', models.CharField(max_length=32)),
+                ('offer', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('flight', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking_jobs', to='demo.flight_model')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='booking_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='bookingjob',
+            index=models.Index(fields=['status', 'run_after'], name='booking_job_queue'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookingjob',
+            constraint=models.UniqueConstraint(condition=models.Q(_negated=True, status='failed'), fields=('offer_id',), name='unique_active_booking_job'),
+        ),
+    ]
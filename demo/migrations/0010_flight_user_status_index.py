@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-18 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0009_outboxemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='flight_model',
+            index=models.Index(fields=['user', 'approved', '-departure_date', '-id'], name='flight_user_status'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 08:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('demo', '0010_flight_user_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingjob',
+            name='order_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='bookingjob',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('review', 'Needs review')], default='pending', max_length=10),
+        ),
+    ]
@@ -2,6 +2,7 @@
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
 import datetime
 
 # Custom User model
@@ -84,6 +85,37 @@ class Flight_model(models.Model):
     # New field for approval status
     approved = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            # One request per user for the same offer, so a double-submitted
+            # booking cannot create it twice. NULLs never clash in a unique
+            # constraint, hence the separate one for one-way trips
+            models.UniqueConstraint(
+                fields=['user', 'origin', 'destination', 'departure_date', 'return_date',
+                        'passenger_count', 'travel_class', 'price'],
+                name='unique_flight_request',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'origin', 'destination', 'departure_date',
+                        'passenger_count', 'travel_class', 'price'],
+                condition=models.Q(return_date__isnull=True),
+                name='unique_one_way_flight_request',
+            ),
+        ]
+        indexes = [
+            # book_flight's lookup of an approved flight matching the offer
+            models.Index(
+                fields=['origin', 'destination', 'departure_date', 'price'],
+                condition=models.Q(approved=True),
+                name='approved_flight_match',
+            ),
+            # A staff member's pending/approved lists, newest departure first
+            models.Index(
+                fields=['user', 'approved', '-departure_date', '-id'],
+                name='flight_user_status',
+            ),
+        ]
+
     def __str__(self):
         return f"Flight from {self.origin} to {self.destination} on {self.departure_date}"
     
@@ -97,3 +129,144 @@ class PriceIncrement(models.Model):
     def __str__(self):
         return f'Price Increment: {self.increment_value}'
 
+
+
+# Reverse-geocoded hotel addresses, keyed on rounded coordinates
+class GeocodedAddress(models.Model):
+    latitude = models.DecimalField(max_digits=8, decimal_places=4)
+    longitude = models.DecimalField(max_digits=8, decimal_places=4)
+    address = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('latitude', 'longitude')
+
+    def __str__(self):
+        return f'{self.latitude}, {self.longitude}: {self.address}'
+
+
+# Flight offers shown on a results page, looked up again by id when booking
+class StoredOffer(models.Model):
+    offer_id = models.CharField(max_length=32, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='stored_offers',
+        null=True,
+        blank=True
+    )
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'Offer {self.offer_id} (expires {self.expires_at})'
+
+
+# Hotel ids Amadeus lists for a city, refreshed in the background once stale
+class CityHotelList(models.Model):
+    city_code = models.CharField(max_length=3, unique=True)
+    hotel_ids = models.JSONField(default=list)
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.city_code}: {len(self.hotel_ids)} hotels'
+
+
+# A flight booking handed to the run_booking_worker process, see booking_jobs
+class BookingJob(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    # The order request went out but its outcome is unknown; never retried
+    REVIEW = 'review'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (REVIEW, 'Needs review'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='booking_jobs',
+        null=True,
+        blank=True
+    )
+    # The approved request that allowed this booking
+    flight = models.ForeignKey(
+        Flight_model,
+        on_delete=models.SET_NULL,
+        related_name='booking_jobs',
+        null=True,
+        blank=True
+    )
+    offer_id = models.CharField(max_length=32)
+    offer = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    # Set just before the order request is sent
+    order_sent_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # A resubmitted booking form finds the job already queued
+            models.UniqueConstraint(
+                fields=['offer_id'],
+                condition=~models.Q(status='failed'),
+                name='unique_active_booking_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='booking_job_queue'),
+        ]
+
+    def __str__(self):
+        return f'Booking job {self.pk} ({self.status})'
+
+
+# Emails written by the views and delivered by the send_outbox command
+class OutboxEmail(models.Model):
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    DEAD = 'dead'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (DEAD, 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    # 'html' when body itself is HTML, as EmailMessage.content_subtype
+    content_subtype = models.CharField(max_length=10, default='plain')
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=32, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_queue'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.to)} ({self.status})'
@@ -0,0 +1,36 @@
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import StoredOffer
+
+
+def store_offers(offers, user=None):
+    """Save raw Amadeus offers server-side and return an opaque id for each."""
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=getattr(settings, 'OFFER_STORE_TTL', 1800))
+    owner = user if user is not None and user.is_authenticated else None
+
+    # Expired rows are cleared on write so the table stays small
+    StoredOffer.objects.filter(expires_at__lte=now).delete()
+
+    rows = [
+        StoredOffer(offer_id=secrets.token_urlsafe(16), user=owner, payload=offer, expires_at=expires_at)
+        for offer in offers
+    ]
+    StoredOffer.objects.bulk_create(rows)
+    return [row.offer_id for row in rows]
+
+
+def get_stored_offer(offer_id, user=None):
+    """Return the stored offer payload, or None if it is unknown, expired or
+    belongs to another user."""
+    stored = StoredOffer.objects.filter(
+        offer_id=offer_id, expires_at__gt=timezone.now()).only('payload', 'user_id').first()
+    if stored is None:
+        return None
+    if stored.user_id is not None and (user is None or stored.user_id != user.pk):
+        return None
+    return stored.payload
@@ -0,0 +1,190 @@
+"""Transactional email outbox.
+
+Views build their ``EmailMessage`` as before and hand it to ``enqueue``,
+which only inserts a row (inside the caller's transaction, if any). The
+``send_outbox`` command drains the table in batches over one reused mail
+connection, retries failures with backoff and parks messages that keep
+failing as dead letters. Where no sender can run (serverless deployments),
+``OUTBOX_INLINE`` drains the outbox once the enqueuing transaction commits.
+"""
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from .models import OutboxEmail
+from .queues import backoff_delay, claimable
+
+logger = logging.getLogger(__name__)
+
+
+def _row(email):
+    html_body = next((content for content, mimetype in getattr(email, 'alternatives', [])
+                      if mimetype == 'text/html'), '')
+    return OutboxEmail(
+        subject=email.subject,
+        body=email.body,
+        content_subtype=email.content_subtype,
+        html_body=html_body,
+        from_email=email.from_email or settings.DEFAULT_FROM_EMAIL,
+        to=list(email.to),
+    )
+
+
+def _flush_inline():
+    try:
+        drain()
+    except Exception as error:
+        # The messages stay queued; the next flush picks them up
+        logger.exception(f"Inline outbox flush failed: {error}")
+
+
+def _schedule_flush():
+    # After commit, so the rows are visible and a rolled back request sends nothing
+    if getattr(settings, 'OUTBOX_INLINE', False):
+        transaction.on_commit(_flush_inline)
+
+
+def enqueue(email):
+    """Queue an ``EmailMessage``/``EmailMultiAlternatives`` for delivery."""
+    row = _row(email)
+    row.save()
+    _schedule_flush()
+    return row
+
+
+def enqueue_many(emails, batch_size=500):
+    """Queue several messages with bulk INSERTs."""
+    rows = OutboxEmail.objects.bulk_create([_row(email) for email in emails], batch_size=batch_size)
+    _schedule_flush()
+    return rows
+
+
+def to_message(row, connection=None):
+    email = EmailMultiAlternatives(row.subject, row.body, row.from_email, row.to, connection=connection)
+    email.content_subtype = row.content_subtype
+    if row.html_body:
+        email.attach_alternative(row.html_body, 'text/html')
+    return email
+
+
+def _claimable(now):
+    # Due messages, and messages a sender claimed but never finished
+    return claimable(now, OutboxEmail.PENDING, OutboxEmail.SENDING, 'next_attempt_at',
+                     getattr(settings, 'OUTBOX_LEASE', 300))
+
+
+def claim_batch(size):
+    """Mark up to ``size`` due messages as sending and return them.
+
+    The claim is one UPDATE tagged with a token, so concurrent senders
+    never get the same message.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    candidates = list(OutboxEmail.objects.filter(_claimable(now))
+                      .order_by('next_attempt_at').values_list('pk', flat=True)[:size])
+    if not candidates:
+        return []
+    OutboxEmail.objects.filter(_claimable(now), pk__in=candidates).update(
+        status=OutboxEmail.SENDING, claimed_by=token, locked_at=now)
+    return list(OutboxEmail.objects.filter(claimed_by=token, status=OutboxEmail.SENDING).order_by('pk'))
+
+
+def retry_delay(attempts):
+    return backoff_delay(attempts, getattr(settings, 'OUTBOX_RETRY_BASE_DELAY', 30),
+                         getattr(settings, 'OUTBOX_RETRY_MAX_DELAY', 3600))
+
+
+def send_batch(rows, connection=None):
+    """Deliver claimed ``rows`` over one connection and record the outcome.
+
+    Returns ``(sent, retried, dead)`` counts.
+    """
+    connection = connection or get_connection()
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 6)
+    sent_ids, failed = [], []
+    try:
+        # One open() for the batch; send_messages reuses an open connection
+        connection.open()
+    except Exception as error:
+        failed = [(row, error) for row in rows]
+    else:
+        try:
+            for row in rows:
+                try:
+                    connection.send_messages([to_message(row, connection)])
+                    sent_ids.append(row.pk)
+                except Exception as error:
+                    failed.append((row, error))
+        finally:
+            connection.close()
+
+    now = timezone.now()
+    OutboxEmail.objects.filter(pk__in=sent_ids).update(
+        status=OutboxEmail.SENT, sent_at=now, locked_at=None, last_error='')
+
+    dead = 0
+    for row, error in failed:
+        row.attempts += 1
+        row.last_error = f'{type(error).__name__}: {error}'
+        row.locked_at = None
+        if row.attempts >= max_attempts:
+            logger.error(f"Giving up on outbox email {row.pk} after {row.attempts} attempts: {error}")
+            row.status = OutboxEmail.DEAD
+            dead += 1
+        else:
+            logger.warning(f"Outbox email {row.pk} failed (attempt {row.attempts}): {error}")
+            row.status = OutboxEmail.PENDING
+            row.next_attempt_at = now + timedelta(seconds=retry_delay(row.attempts))
+        row.save(update_fields=['status', 'attempts', 'next_attempt_at', 'locked_at', 'last_error'])
+    return len(sent_ids), len(failed) - dead, dead
+
+
+def drain(batch_size=None, connection=None, on_batch=None):
+    """Send every due message, a batch at a time. ``on_batch`` is called with
+    ``(sent, retried, dead, seconds)`` after each batch."""
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+    totals = [0, 0, 0]
+    while True:
+        rows = claim_batch(batch_size)
+        if not rows:
+            return tuple(totals)
+        started_at = time.perf_counter()
+        counts = send_batch(rows, connection)
+        totals = [total + count for total, count in zip(totals, counts)]
+        if on_batch:
+            on_batch(*counts, time.perf_counter() - started_at)
+
+
+def requeue_dead():
+    """Give dead letters a fresh set of attempts; returns how many."""
+    return OutboxEmail.objects.filter(status=OutboxEmail.DEAD).update(
+        status=OutboxEmail.PENDING, attempts=0, next_attempt_at=timezone.now())
+
+
+def purge_sent(older_than):
+    return OutboxEmail.objects.filter(status=OutboxEmail.SENT, sent_at__lt=timezone.now() - older_than).delete()[0]
+
+
+def stats():
+    """Queue depth per status, age of the oldest waiting message and
+    messages sent in the last five minutes."""
+    now = timezone.now()
+    counts = dict(OutboxEmail.objects.values_list('status').annotate(Count('pk')).order_by())
+    oldest = OutboxEmail.objects.filter(status=OutboxEmail.PENDING).aggregate(Min('created_at'))['created_at__min']
+    return {
+        'pending': counts.get(OutboxEmail.PENDING, 0),
+        'sending': counts.get(OutboxEmail.SENDING, 0),
+        'sent': counts.get(OutboxEmail.SENT, 0),
+        'dead': counts.get(OutboxEmail.DEAD, 0),
+        'oldest_pending_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'sent_last_5m': OutboxEmail.objects.filter(
+            status=OutboxEmail.SENT, sent_at__gte=now - timedelta(minutes=5)).count(),
+    }
@@ -0,0 +1,34 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import PriceIncrement
+
+_increment = None
+_loaded_at = 0
+_lock = threading.Lock()
+
+
+def get_increment_value():
+    """Current price markup, loaded from the database at most once per
+    PRICE_INCREMENT_CACHE_TTL seconds per process.
+
+    Saving or deleting a PriceIncrement clears the cache (see signals.py); the
+    TTL only matters for other worker processes.
+    """
+    global _increment, _loaded_at
+    ttl = getattr(settings, 'PRICE_INCREMENT_CACHE_TTL', 60)
+    if _increment is None or time.monotonic() - _loaded_at > ttl:
+        with _lock:
+            if _increment is None or time.monotonic() - _loaded_at > ttl:
+                increment = PriceIncrement.objects.first()  # assuming only one record exists
+                _increment = increment.increment_value if increment else 0
+                _loaded_at = time.monotonic()
+    return _increment
+
+
+def invalidate_increment_cache():
+    global _increment
+    with _lock:
+        _increment = None
@@ -0,0 +1,29 @@
+"""Claiming and backoff shared by the database-backed queues (booking jobs
+and the email outbox).
+
+A row is claimed by a conditional UPDATE that only matches while it is
+still claimable, so several workers can share a table on SQLite or Postgres.
+"""
+import random
+from datetime import timedelta
+
+from django.db.models import Q
+
+
+def lease_cutoff(now, lease):
+    # Claims taken before this have outlived their ``lease`` (seconds)
+    return now - timedelta(seconds=lease)
+
+
+def claimable(now, pending, running, due_field, lease, **stale):
+    """Rows in status ``pending`` whose ``due_field`` has passed, and rows
+    left in status ``running`` for longer than ``lease`` seconds by a worker
+    that never finished them. ``stale`` narrows the second group further."""
+    return (Q(status=pending, **{f'{due_field}__lte': now})
+            | Q(status=running, locked_at__lt=lease_cutoff(now, lease), **stale))
+
+
+def backoff_delay(attempts, base, cap):
+    """Seconds to wait before try ``attempts + 1``: exponential up to ``cap``,
+    with jitter so retries after an outage spread out."""
+    return min(cap, base * 2 ** (attempts - 1)) * random.uniform(0.5, 1)
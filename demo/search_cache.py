@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class SearchCache:
+    """In-process TTL + LRU cache for Amadeus search responses.
+
+    Entries expire ``ttl`` seconds after they were stored and the least
+    recently used entry is evicted once ``max_size`` is reached.
+    """
+
+    def __init__(self, ttl=300, max_size=256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        # Returns (found, value) so that cached empty results still count as hits
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_call(self, key, func, use_cache=True):
+        # Only successful calls are stored; exceptions propagate to the caller
+        if use_cache:
+            found, value = self.get(key)
+            if found:
+                return value
+        value = func()
+        self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def location_search_key(term):
+    # Autocomplete terms differ only in case and spacing between keystrokes
+    return ('locations', ' '.join((term or '').upper().split()))
+
+
+def flight_search_key(kind, origin, destination, departure_date, return_date=None, adults=None):
+    # Normalize the query so "lhr"/"LHR " and "1"/1 share the same entry. A
+    # count that is not a number is kept as typed and left for Amadeus to
+    # reject like any other bad search
+    adults = str(adults or '').strip() or '1'
+    return (
+        kind,
+        (origin or '').strip().upper(),
+        (destination or '').strip().upper(),
+        (departure_date or '').strip(),
+        (return_date or '').strip(),
+        int(adults) if adults.isdigit() else adults,
+    )
+
+
+search_cache = SearchCache(
+    ttl=getattr(settings, 'FLIGHT_SEARCH_CACHE_TTL', 300),
+    max_size=getattr(settings, 'FLIGHT_SEARCH_CACHE_SIZE', 256),
+)
+
+# Amadeus' autocomplete answers change rarely, so they are kept much longer
+location_cache = SearchCache(
+    ttl=getattr(settings, 'LOCATION_SEARCH_CACHE_TTL', 24 * 3600),
+    max_size=getattr(settings, 'LOCATION_SEARCH_CACHE_SIZE', 4096),
+)
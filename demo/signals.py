@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .flight_lists import invalidate_flight_counts
+from .models import PriceIncrement, Flight_model
+from .pricing import invalidate_increment_cache
+
+
+@receiver([post_save, post_delete], sender=PriceIncrement)
+def price_increment_changed(sender, **kwargs):
+    invalidate_increment_cache()
+
+
+@receiver([post_save, post_delete], sender=Flight_model)
+def flight_changed(sender, instance, **kwargs):
+    # After commit, so a count recomputed in between is not cached stale
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_flight_counts([user_id]))
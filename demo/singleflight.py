@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .file_lock import file_lock
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class Group:
+    """Coalesces identical concurrent calls into one.
+
+    The first caller of ``do(key, fn)`` runs ``fn``; callers with the same key
+    that arrive while it is running wait for it and get the same result (or
+    the same exception). Nothing is kept once the call has finished.
+
+    With ``shared=True`` the call is also coalesced across processes: the
+    leader of each process takes a file lock for the key, and a result that
+    another worker finished after we started waiting is read back from the
+    Django cache ``cache_alias`` instead of calling ``fn`` again. That cache
+    must be shared between workers (file, database, memcached, redis).
+    """
+
+    def __init__(self, shared=False, cache_alias='default', shared_ttl=30, lock_dir=None):
+        self.shared = shared
+        self.cache_alias = cache_alias
+        self.shared_ttl = shared_ttl
+        self.lock_dir = lock_dir or tempfile.gettempdir()
+        self.calls = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = self._call_shared(key, fn) if self.shared else fn()
+            return call.value
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, fn):
+        """``do`` for coroutines: ``fn()`` returns an awaitable. Calls are
+        coalesced per event loop; the cross-process mode does not apply."""
+        loop = asyncio.get_running_loop()
+        call_key = (loop, key)
+        with self._lock:
+            future = self._async_calls.get(call_key)
+            leader = future is None
+            if leader:
+                future = loop.create_future()
+                self._async_calls[call_key] = future
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            # shield: a follower giving up must not cancel the shared call
+            return await asyncio.shield(future)
+
+        try:
+            value = await fn()
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            # Mark it retrieved so a call nobody else waited on is not logged
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._async_calls[call_key]
+
+    def _call_shared(self, key, fn):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        cache = caches[self.cache_alias]
+        cache_key = 'singleflight:' + digest
+        waiting_since = time.time()
+        with file_lock(self._lock_path(digest)):
+            # Only a call that finished while we waited counts as in flight;
+            # anything older is a stale result, not a coalesced one
+            shared = cache.get(cache_key)
+            if shared is not None and shared[0] >= waiting_since:
+                with self._lock:
+                    self.shared_hits += 1
+                return shared[1]
+            value = fn()
+            cache.set(cache_key, (time.time(), value), self.shared_ttl)
+            return value
+
+    def _lock_path(self, digest):
+        # One lock file per key, so only identical calls wait on each other.
+        # The files are empty and kept in their own directory; they are not
+        # removed, as unlinking a file another process is waiting on would
+        # let a third one lock a fresh file and run the call alongside
+        return os.path.join(self.lock_dir, 'singleflight', f'{digest}.lock')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'shared': self.shared,
+                'in_flight': len(self._calls) + len(self._async_calls),
+                'calls': self.calls,
+                'coalesced': self.coalesced,
+                'shared_hits': self.shared_hits,
+            }
+
+
+amadeus_calls = Group(
+    shared=getattr(settings, 'SINGLEFLIGHT_SHARED', False),
+    cache_alias=getattr(settings, 'SINGLEFLIGHT_CACHE', 'default'),
+    shared_ttl=getattr(settings, 'SINGLEFLIGHT_SHARED_TTL', 30),
+    lock_dir=getattr(settings, 'SINGLEFLIGHT_LOCK_DIR', None),
+)
@@ -1,14 +1,22 @@
+from django.conf import settings
 from django.urls import path
 
 from . import views
 
+# Search views that mostly wait on Amadeus have async versions for ASGI
+if settings.ASYNC_SEARCH_VIEWS:
+    from . import async_views as search_views
+else:
+    search_views = views
+
 urlpatterns = [
-    path('', views.demo, name='home'),
-    path('origin_airport_search/', views.origin_airport_search,
+    path('', search_views.demo, name='home'),
+    path('origin_airport_search/', search_views.origin_airport_search,
          name='origin_airport_search'),
-    path('destination_airport_search/', views.destination_airport_search,
+    path('destination_airport_search/', search_views.destination_airport_search,
          name='destination_airport_search'),
     path('book_flight/', views.book_flight, name='book_flight'),
+    path('book_flight/<int:job_id>/', views.booking_status, name='booking_status'),
     path('register/', views.staff_register, name='register'),
     path('login/', views.staff_login, name='login'),
     path('logout/', views.logout_view, name='logout'),
@@ -27,6 +35,7 @@ urlpatterns = [
     path('administrator/approve-flight/',
          views.approve_flight, name='approve_flight'),
     path('administrator/report/', views.report, name='report'),
+    path('administrator/metrics/', views.upstream_metrics, name='upstream_metrics'),
 
 
     path('thrive-administrator/register/',
@@ -49,11 +58,11 @@ urlpatterns = [
     #     Hotel Urls
 
 
-    path('hotel/', views.hotel, name='hotel'),
-    path('city_search/', views.city_search, name='city_search'),
+    path('hotel/', search_views.hotel, name='hotel'),
+    path('city_search/', search_views.city_search, name='city_search'),
     path('book_hotel/<str:offer_id>', views.book_hotel, name='book_hotel'),
     path('rooms_per_hotel/<str:hotel>/<str:departureDate>/<str:returnDate>',
-         views.rooms_per_hotel, name='rooms_per_hotel')
+         search_views.rooms_per_hotel, name='rooms_per_hotel')
 
 
 ]
@@ -2,24 +2,45 @@ from django.utils.html import strip_tags
 from django.core.mail import EmailMultiAlternatives
 from django.db import transaction
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.template.loader import render_to_string, get_template
 from django.core.mail import EmailMessage
 import json
-import ast
-import urllib.parse
+import os
+import hashlib
 import csv
 import xlwt
 import logging
 import requests
+import time
+from decimal import Decimal
+from functools import partial
+from urllib.request import urlopen
 from amadeus import Client, ResponseError, Location
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from .flight import Flight
+from .flight import parse_offers
+from .fare_matrix import date_grid, cheapest_price, build_matrix
 from .booking import Booking
 from .hotel import Hotel
 from .room import Room
-from .models import Admin, Staff, Profile, Flight_model, PriceIncrement, ThriveAdmin
-from django.http import HttpResponse
+from .search_cache import search_cache, location_cache, flight_search_key, location_search_key
+from .singleflight import amadeus_calls
+from .limiter import amadeus_limiter, LimitExceeded
+from .workers import submit, result_or_default, map_unordered
+from .airports import local_locations
+from .geocoding import AddressPage
+from .hotel_catalog import get_city_hotel_ids
+from .amadeus_auth import TokenManager
+from .http_client import http_client, amadeus_url
+from .amadeus_replay import amadeus_http, configure_http_client
+from .offer_store import store_offers, get_stored_offer
+from .flight_lists import user_flights, keyset_page, flight_count, invalidate_flight_counts
+from .booking_jobs import enqueue_booking, run_inline, mark_order_sent, OrderOutcomeUnknown
+from . import outbox
+from .pricing import get_increment_value
+from .models import Admin, Staff, Profile, Flight_model, PriceIncrement, ThriveAdmin, BookingJob
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from .forms import AdminUserCreationForm, StaffUserCreationForm, ProfileForm, ThriveAdminUserCreationForm
@@ -27,7 +48,23 @@ from django.contrib.auth import login as auth_login, logout as auth_logout, auth
 logger = logging.getLogger(__name__)
 
 
-amadeus = Client()
+# Every SDK call goes through the adaptive limiter and has a timeout, so a
+# slow Amadeus cannot tie up all workers
+amadeus = Client(http=amadeus_limiter.wrap(amadeus_http(
+    partial(urlopen, timeout=settings.AMADEUS_REQUEST_TIMEOUT))))
+# AMADEUS_BACKEND = 'record'/'replay' also covers the direct REST calls
+configure_http_client(http_client)
+
+UPSTREAM_BUSY_MESSAGE = "Search is very busy right now. Please try again in a moment."
+
+
+def upstream_error_message(error):
+    # A NetworkError (timeout, refused connection) has no response body, and
+    # LimitExceeded no response at all
+    try:
+        return error.response.result["errors"][0]["detail"]
+    except (AttributeError, TypeError, KeyError, IndexError):
+        return UPSTREAM_BUSY_MESSAGE
 
 
 # ==========   ADMIN ============== >
@@ -143,6 +180,20 @@ def coming_soon(request):
     return render(request, 'demo/coming_soon.html')
 
 
+@login_required(login_url='admin_login')
+def upstream_metrics(request):
+    """Per-process counters for outbound calls and the email outbox backlog, as JSON."""
+    return JsonResponse({
+        'pid': os.getpid(),
+        'http': http_client.stats(),
+        'search_cache': search_cache.stats(),
+        'location_cache': location_cache.stats(),
+        'singleflight': amadeus_calls.stats(),
+        'limiter': amadeus_limiter.stats(),
+        'outbox': outbox.stats(),
+    })
+
+
 @login_required(login_url='admin_login')
 def approve_flight(request):
     if request.method == 'POST':
@@ -150,43 +201,53 @@ def approve_flight(request):
         flight_ids = request.POST.getlist('flight_ids')
 
         if flight_ids:
-            flights = Flight_model.objects.filter(id__in=flight_ids)
-
-            for flight in flights:
-                flight.approved = True
-                flight.save()
+            with transaction.atomic():
+                # Lock the selected requests so a concurrent approval of the
+                # same flights waits, then approve them in one UPDATE
+                flights = list(
+                    Flight_model.objects.select_for_update(of=('self',))
+                    .filter(id__in=flight_ids, approved=False)
+                    .select_related('user')
+                )
+                Flight_model.objects.filter(id__in=[flight.id for flight in flights]).update(approved=True)
+                # update() sends no signals, so drop the staff list counts here,
+                # once the approval is visible; a count recomputed before then
+                # would cache the old numbers again
+                user_ids = [flight.user_id for flight in flights]
+                transaction.on_commit(lambda: invalidate_flight_counts(user_ids))
+
+                # Notifications are queued in the same transaction
+                template = get_template('demo/email/flight_approval_email.html')
+                emails = []
+                for flight in flights:
+                    if flight.user is None or not flight.user.email:
+                        continue
+                    email = EmailMultiAlternatives(
+                        subject='Your Flight Booking Has Been Approved',
+                        body='This is an HTML email. Please view it in a browser.',
+                        from_email=settings.EMAIL_HOST_USER,
+                        to=[flight.user.email],
+                    )
+                    email.attach_alternative(template.render({
+                        'user': flight.user,
+                        'origin': flight.origin,
+                        'destination': flight.destination,
+                        'departure_date': flight.departure_date,
+                    }), "text/html")
+                    emails.append(email)
+                outbox.enqueue_many(emails)
+
+            if len(flights) == 1:
+                flight = flights[0]
                 messages.success(
                     request, f'Flight {flight.origin} to {flight.destination} on {flight.departure_date} has been approved.')
-
-                # Prepare email context
-                email_context = {
-                    'user': flight.user,  # Assuming the Flight model has a foreign key to User
-                    'origin': flight.origin,
-                    'destination': flight.destination,
-                    'departure_date': flight.departure_date,
-                }
-
-                # Render the HTML email template
-                email_body = render_to_string(
-                    'demo/email/flight_approval_email.html', email_context)
-
-                # Create email message
-                email = EmailMultiAlternatives(
-                    subject='Your Flight Booking Has Been Approved',
-                    body='This is an HTML email. Please view it in a browser.',
-                    from_email=settings.EMAIL_HOST_USER,
-                    to=[flight.user.email],
-                )
-
-                # Attach the HTML body to the email
-                email.attach_alternative(email_body, "text/html")
-                email.send(fail_silently=False)
-                print(f"Sent email to {flight.user.email}")
+            elif flights:
+                messages.success(request, f'{len(flights)} flights have been approved.')
 
             return redirect('approve_flight')
 
     # Fetch all flights where approval status is False
-    pending_flights = Flight_model.objects.filter(approved=False)
+    pending_flights = Flight_model.objects.filter(approved=False).select_related('user__profile')
     return render(request, 'demo/admin/approve_flight.html', {'pending_flights': pending_flights})
 
 
@@ -256,18 +317,35 @@ def report(request):
 # Export to CSV
 
 
+class Echo:
+    # csv.writer target that hands each formatted row back instead of buffering it
+    def write(self, value):
+        return value
+
+
 def export_combined_to_csv(flights, staff_members, admins):
-    response = HttpResponse(content_type='text/csv')
+    # Rows are streamed as they are read, so memory use does not grow with
+    # the number of flights
+    response = StreamingHttpResponse(
+        combined_csv_rows(flights, staff_members, admins), content_type='text/csv')
     response['Content-Disposition'] = 'attachment; filename="report.csv"'
+    return response
 
-    writer = csv.writer(response)
-    writer.writerow(['Flight Report'])
-    writer.writerow(['First Name', 'Last Name', 'Origin', 'Destination',
-                    'Travel Class', 'Departure Date', 'Return Date', 'Approved'])
-    for flight in flights:
-        writer.writerow([
-            flight.user.first_name,
-            flight.user.last_name,
+
+def combined_csv_rows(flights, staff_members, admins):
+    writer = csv.writer(Echo())
+    yield writer.writerow(['Flight Report'])
+    yield writer.writerow(['First Name', 'Last Name', 'Origin', 'Destination',
+                           'Travel Class', 'Departure Date', 'Return Date', 'Approved'])
+    # One query per section: users are joined in, and only the exported
+    # columns are loaded
+    flights = flights.select_related('user').only(
+        'origin', 'destination', 'travel_class', 'departure_date', 'return_date', 'approved',
+        'user__first_name', 'user__last_name')
+    for flight in flights.iterator(chunk_size=2000):
+        yield writer.writerow([
+            flight.user.first_name if flight.user else '',
+            flight.user.last_name if flight.user else '',
             flight.origin,
             flight.destination,
             flight.travel_class,
@@ -276,23 +354,27 @@ def export_combined_to_csv(flights, staff_members, admins):
             'Approved' if flight.approved else 'Unapproved'
         ])
 
-    writer.writerow([])
-    writer.writerow(['Staff Report'])
-    writer.writerow(['First Name', 'Last Name', 'Email', 'Phone'])
-    for staff in staff_members:
-        writer.writerow([
+    yield writer.writerow([])
+    yield writer.writerow(['Staff Report'])
+    yield writer.writerow(['First Name', 'Last Name', 'Email', 'Phone'])
+    staff_members = staff_members.select_related('staff').only(
+        'first_name', 'last_name', 'phone', 'staff__email')
+    for staff in staff_members.iterator(chunk_size=2000):
+        yield writer.writerow([
             staff.first_name,
             staff.last_name,
             staff.staff.email,
             staff.phone
         ])
 
-    writer.writerow([])
-    writer.writerow(['Admin Report'])
-    writer.writerow(['First Name', 'Last Name', 'Email',
-                    'Phone', 'Approval Status'])
-    for admin in admins:
-        writer.writerow([
+    yield writer.writerow([])
+    yield writer.writerow(['Admin Report'])
+    yield writer.writerow(['First Name', 'Last Name', 'Email',
+                           'Phone', 'Approval Status'])
+    admins = admins.select_related('admin').only(
+        'first_name', 'last_name', 'phone', 'approval_status', 'admin__email')
+    for admin in admins.iterator(chunk_size=2000):
+        yield writer.writerow([
             admin.first_name,
             admin.last_name,
             admin.admin.email,
@@ -300,8 +382,6 @@ def export_combined_to_csv(flights, staff_members, admins):
             'Approved' if admin.approval_status else 'Not Approved'
         ])
 
-    return response
-
 # Export to Excel
 
 
@@ -443,21 +523,36 @@ def pending_flights(request):
     # Get the authenticated user
     user = request.user
 
-    # Filter flights where `approved` is False and `user` is the authenticated user
-    pending_flights = Flight_model.objects.filter(
-        user=user, approved=False).order_by('-departure_date')
-    return render(request, 'demo/staff/pending_flights.html', {'pending_flights': pending_flights})
+    # Flights where `approved` is False and `user` is the authenticated user,
+    # one page at a time
+    flights, newer, older = keyset_page(
+        user_flights(user, approved=False),
+        after=request.GET.get('after'), before=request.GET.get('before'),
+        page_size=settings.FLIGHT_LIST_PAGE_SIZE)
+    return render(request, 'demo/staff/pending_flights.html', {
+        'pending_flights': flights,
+        'total': flight_count(user, approved=False),
+        'newer': newer,
+        'older': older,
+    })
 
 
 def approved_flights(request):
     # Get the authenticated user
     user = request.user
 
-    # Filter flights where `approved` is True and `user` is the authenticated user
-    approved_flights = Flight_model.objects.filter(
-        user=user, approved=True).order_by('-departure_date')
-
-    return render(request, 'demo/staff/approved_flights.html', {'approved_flights': approved_flights})
+    # Flights where `approved` is True and `user` is the authenticated user,
+    # one page at a time
+    flights, newer, older = keyset_page(
+        user_flights(user, approved=True),
+        after=request.GET.get('after'), before=request.GET.get('before'),
+        page_size=settings.FLIGHT_LIST_PAGE_SIZE)
+    return render(request, 'demo/staff/approved_flights.html', {
+        'approved_flights': flights,
+        'total': flight_count(user, approved=True),
+        'newer': newer,
+        'older': older,
+    })
 
 
 # =========     PROFILE ===================>
@@ -533,6 +628,8 @@ def demo(request):
     departure_date = request.POST.get("Departuredate")
     return_date = request.POST.get("Returndate")
     passenger_count = request.POST.get("passengerCount")
+    # Staff can tick "refresh" on the search form to bypass cached fares
+    use_cache = not request.POST.get("refresh")
 
     kwargs = {
         "originLocationCode": origin,
@@ -544,79 +641,235 @@ def demo(request):
     tripPurpose = ""
     if return_date:
         kwargs["returnDate"] = return_date
-        kwargs_trip_purpose = {
-            "originLocationCode": origin,
-            "destinationLocationCode": destination,
+
+    if origin and destination and departure_date and request.POST.get("flexibleDates"):
+        return flexible_date_search(request, origin, destination, departure_date,
+                                    return_date, passenger_count, use_cache)
+
+    if origin and destination and departure_date:
+        # Trip purpose is independent of the offers search, so it runs in the
+        # worker pool while the offers are fetched on this thread
+        trip_purpose_future = None
+        started_at = time.monotonic()
+        if return_date:
+            kwargs_trip_purpose = {
+                "originLocationCode": origin,
+                "destinationLocationCode": destination,
+                "departureDate": departure_date,
+                "returnDate": return_date,
+            }
+            trip_purpose_key = flight_search_key("trip_purpose", origin, destination,
+                                                 departure_date, return_date)
+            trip_purpose_future = submit(
+                search_cache.get_or_call,
+                trip_purpose_key,
+                lambda: amadeus_calls.do(
+                    trip_purpose_key,
+                    lambda: amadeus.travel.predictions.trip_purpose.get(
+                        **kwargs_trip_purpose).data),
+                use_cache=use_cache,
+            )
+
+        offers_key = flight_search_key("flight_offers", origin, destination,
+                                       departure_date, return_date, passenger_count)
+
+        def fetch_offers():
+            # Identical searches already in flight share one upstream call
+            return search_cache.get_or_call(
+                offers_key,
+                lambda: amadeus_calls.do(
+                    offers_key,
+                    lambda: amadeus.shopping.flight_offers_search.get(
+                        **kwargs).data),
+                use_cache=use_cache,
+            )
+
+        header = {
+            "origin": origin,
+            "destination": destination,
             "departureDate": departure_date,
             "returnDate": return_date,
         }
-        try:
-            trip_purpose_response = amadeus.travel.predictions.trip_purpose.get(
-                **kwargs_trip_purpose).data
-            tripPurpose = trip_purpose_response["result"]
-        except ResponseError as error:
-            messages.error(
-                request, error.response.result["errors"][0]["detail"])
-            return render(request, "demo/home.html")
 
-    if origin and destination and departure_date:
+        if settings.FLIGHT_RESULTS_STREAMING:
+            # Rows are rendered after the response has started, so make sure
+            # the CSRF cookie for their booking forms is set up front
+            get_token(request)
+            streaming_response = StreamingHttpResponse(
+                stream_flight_results(request, fetch_offers, trip_purpose_future, started_at, header),
+                content_type="text/html; charset=utf-8",
+            )
+            # Ask reverse proxies not to buffer the stream
+            streaming_response["X-Accel-Buffering"] = "no"
+            return streaming_response
+
         try:
-            search_flights = amadeus.shopping.flight_offers_search.get(
-                **kwargs)
+            search_flights = fetch_offers()
         except ResponseError as error:
-            messages.error(
-                request, error.response.result["errors"][0]["detail"])
+            messages.error(request, upstream_error_message(error))
+            return render(request, "demo/home.html")
+        except LimitExceeded:
+            messages.error(request, UPSTREAM_BUSY_MESSAGE)
             return render(request, "demo/home.html")
 
-        search_flights_returned = []
-        response = []
+        # Trip purpose is only decoration on the results page: render without
+        # it if it is slow or failed rather than holding the offers back
+        if trip_purpose_future is not None:
+            trip_purpose_response = result_or_default(
+                trip_purpose_future, settings.TRIP_PURPOSE_TIMEOUT,
+                default={}, started_at=started_at)
+            tripPurpose = trip_purpose_response.get("result", "")
 
-        for flight in search_flights.data:
-            offer = Flight(flight).construct_flights()
-            search_flights_returned.append(offer)
+        offers = build_flight_offers(search_flights, user)
 
-        response = zip(search_flights_returned, search_flights.data)
         # Check if the response is empty and pass a message to the template
-        if not search_flights_returned:
+        if not offers:
             messages.info(request, "No flight itinerary for this route.")
             return redirect('home')
 
         return render(
             request,
             "demo/results.html",
-            {
-                "response": response,
-                "origin": origin,
-                "destination": destination,
-                "departureDate": departure_date,
-                "returnDate": return_date,
-                "tripPurpose": tripPurpose,
-            },
+            dict(header, offers=offers, tripPurpose=tripPurpose),
         )
 
     return render(request, "demo/home.html")
 
 
-def get_access_token():
+def flexible_date_search(request, origin, destination, departure_date, return_date, passenger_count, use_cache):
     try:
-        # Determine API endpoint based on hostname
-        if settings.AMADEUS_HOSTNAME == 'production':
-            api_endpoint = "https://api.amadeus.com/v1/security/oauth2/token"
+        grid = date_grid(departure_date, return_date, settings.FLEX_DATE_DAYS)
+    except ValueError:
+        messages.error(request, "Please enter valid travel dates.")
+        return render(request, "demo/home.html")
+
+    def search_cell(cell):
+        cell_departure, cell_return = cell
+        cell_kwargs = {
+            "originLocationCode": origin,
+            "destinationLocationCode": destination,
+            "departureDate": cell_departure,
+            "adults": passenger_count,
+        }
+        if cell_return:
+            cell_kwargs["returnDate"] = cell_return
+        # Same key as a normal search, so cells and full searches share cache entries
+        key = flight_search_key("flight_offers", origin, destination,
+                                cell_departure, cell_return, passenger_count)
+        return search_cache.get_or_call(
+            key,
+            lambda: amadeus_calls.do(
+                key,
+                lambda: amadeus.shopping.flight_offers_search.get(**cell_kwargs).data),
+            use_cache=use_cache,
+        )
+
+    # Only the cheapest price of each date pair is kept, no offers are built
+    increment_value = get_increment_value()
+    prices = {}
+    first_error = None
+    for cell, future in map_unordered(search_cell, grid, settings.FLEX_DATE_CONCURRENCY):
+        try:
+            prices[cell] = cheapest_price(future.result(), increment_value)
+        except (ResponseError, LimitExceeded) as error:
+            logger.warning(f"Flexible-date search {origin}-{destination} {cell} failed: {error}")
+            first_error = first_error or error
+            prices[cell] = None
+
+    if not any(price is not None for price in prices.values()):
+        if isinstance(first_error, LimitExceeded):
+            messages.error(request, UPSTREAM_BUSY_MESSAGE)
+        elif first_error is not None:
+            messages.error(request, upstream_error_message(first_error))
         else:
-            api_endpoint = "https://test.api.amadeus.com/v1/security/oauth2/token"
-
-        response = requests.post(
-            api_endpoint,
-            data={
-                "grant_type": "client_credentials",
-                "client_id": settings.AMADEUS_CLIENT_ID,
-                "client_secret": settings.AMADEUS_CLIENT_SECRET,
-            },
+            messages.info(request, "No flight itinerary for these dates.")
+        return render(request, "demo/home.html")
+
+    return render(request, "demo/flight_results/matrix.html", {
+        "origin": origin,
+        "destination": destination,
+        "departureDate": departure_date,
+        "returnDate": return_date or None,
+        "passengerCount": passenger_count,
+        "flex_days": settings.FLEX_DATE_DAYS,
+        "matrix": build_matrix(prices),
+    })
+
+
+def build_flight_offers(search_flights, user):
+    offers = parse_offers(search_flights, get_increment_value())
+    # Raw offers stay on the server; the page only posts back their ids
+    offer_ids = store_offers([offer.raw for offer in offers], user)
+    for offer, offer_id in zip(offers, offer_ids):
+        offer.offer_id = offer_id
+    return offers
+
+
+def stream_flight_results(request, fetch_offers, trip_purpose_future, started_at, header):
+    # Send the page shell straight away, then the offer rows in batches as
+    # they are built, and finally the footer (messages, scripts)
+    yield render_to_string("demo/flight_results/head.html", header, request)
+
+    try:
+        search_flights = fetch_offers()
+    except ResponseError as error:
+        messages.error(request, upstream_error_message(error))
+        search_flights = []
+    except LimitExceeded:
+        messages.error(request, UPSTREAM_BUSY_MESSAGE)
+        search_flights = []
+
+    batch_size = settings.FLIGHT_RESULTS_BATCH_SIZE
+    for start in range(0, len(search_flights), batch_size):
+        batch = search_flights[start:start + batch_size]
+        offers = build_flight_offers(batch, request.user)
+        yield render_to_string(
+            "demo/flight_results/rows.html",
+            {"offers": offers, "offset": start},
+            request,
         )
-        response.raise_for_status()
-        token_data = response.json()
-        return token_data["access_token"]
-    except requests.exceptions.RequestException as e:
+
+    trip_purpose = ""
+    if trip_purpose_future is not None:
+        trip_purpose = result_or_default(
+            trip_purpose_future, settings.TRIP_PURPOSE_TIMEOUT,
+            default={}, started_at=started_at).get("result", "")
+
+    yield render_to_string(
+        "demo/flight_results/foot.html",
+        {"no_results": not search_flights, "streamed_trip_purpose": trip_purpose},
+        request,
+    )
+
+
+def request_access_token():
+    response = http_client.post(
+        amadeus_url("/v1/security/oauth2/token"),
+        data={
+            "grant_type": "client_credentials",
+            "client_id": settings.AMADEUS_CLIENT_ID,
+            "client_secret": settings.AMADEUS_CLIENT_SECRET,
+        },
+    )
+    response.raise_for_status()
+    token_data = response.json()
+    return token_data["access_token"], token_data.get("expires_in", 1799)
+
+
+token_manager = TokenManager(
+    request_access_token,
+    cache_path=os.path.join(
+        settings.AMADEUS_TOKEN_CACHE_DIR,
+        f"amadeus-token-{settings.AMADEUS_HOSTNAME}-"
+        f"{hashlib.sha256(settings.AMADEUS_CLIENT_ID.encode()).hexdigest()[:12]}.json"),
+    refresh_before=settings.AMADEUS_TOKEN_REFRESH_BEFORE,
+)
+
+
+def get_access_token():
+    try:
+        return token_manager.get_token()
+    except (requests.exceptions.RequestException, KeyError, ValueError) as e:
         logger.error(f"Failed to get access token: {str(e)}")
         raise Exception(f"Failed to get access token: {str(e)}")
 
@@ -627,28 +880,16 @@ def book_flight(request):
         return redirect('home')
 
     try:
-        # Get flight data from POST
-        flight = request.POST.get('flight_data')
-        if not flight:
+        # Look up the offer the results page was rendered with
+        offer_id = request.POST.get('offer_id')
+        if not offer_id:
             messages.error(request, "No flight data provided")
             return redirect('home')
 
-        # The template posts a URL-encoded string; decode first
-        try:
-            decoded = urllib.parse.unquote_plus(flight)
-        except Exception:
-            decoded = flight
-
-        # Try to parse JSON first, then fall back to ast.literal_eval
-        try:
-            flight_data = json.loads(decoded)
-        except Exception as json_err:
-            try:
-                flight_data = ast.literal_eval(decoded)
-            except Exception as eval_err:
-                logger.exception(f"Failed to parse flight data: json_err={json_err}, eval_err={eval_err}")
-                messages.error(request, "Invalid flight data format")
-                return redirect('home')
+        flight_data = get_stored_offer(offer_id, request.user)
+        if flight_data is None:
+            messages.error(request, "This flight offer has expired. Please search again.")
+            return redirect('home')
 
         logger.debug(f"Processing flight data: {type(flight_data)}")
 
@@ -665,9 +906,12 @@ def book_flight(request):
 
         # Multiply the price by 1600
         price_in_local_currency = price * 1600
+        # As stored in Flight_model.price, so both lookups below match the same rows
+        stored_price = round(Decimal(price_in_local_currency), 2)
 
-        # Check if the flight already exists
-        existing_flight = Flight_model.objects.filter(
+        # Record the request once: the unique constraints on Flight_model make
+        # a concurrent duplicate POST fall back to fetching the existing row
+        Flight_model.objects.get_or_create(
             user=request.user,
             origin=origin,
             destination=destination,
@@ -675,119 +919,32 @@ def book_flight(request):
             return_date=return_date if return_date else None,
             passenger_count=passenger_count,
             travel_class=travel_class,
-            price=price_in_local_currency
-        ).first()
-
-        # If the flight doesn't exist, create it
-        if not existing_flight:
-            Flight_model.objects.create(
-                user=request.user,
-                origin=origin,
-                destination=destination,
-                departure_date=departure_date,
-                return_date=return_date if return_date else None,
-                passenger_count=passenger_count,
-                travel_class=travel_class,
-                price=price_in_local_currency
-            )
+            price=stored_price
+        )
 
         print(f"Extracted flight details: departure_date={departure_date}, return_date={return_date}, "
               f"passenger_count={passenger_count}, travel_class={travel_class}, "
               f"origin={origin}, destination={destination}")
 
         # Find approved flights for any user matching the criteria
-        approved_flights = Flight_model.objects.filter(
+        approved_flight = Flight_model.objects.filter(
             origin=origin,
             destination=destination,
             departure_date=departure_date,
             return_date=return_date,
             passenger_count=passenger_count,
             travel_class__iexact=travel_class,
-            price=price_in_local_currency,
+            price=stored_price,
             approved=True
-        )
-
-        if approved_flights:
-            for approved_flight in approved_flights:
-                user = approved_flight.user
+        ).first()
 
-                # Proceed with booking logic using the current user data
-                try:
-                    with transaction.atomic():
-                        # Get access token
-                        token = get_access_token()
-                        headers = {
-                            'Authorization': f'Bearer {token}',
-                            'Content-Type': 'application/json'
-                        }
-
-                        # Prepare traveler information
-                        traveler = {
-                            "id": "1",
-                            "dateOfBirth": "1982-01-16",
-                            "name": {"firstName": "JORGE", "lastName": "GONZALES"},
-                            "gender": "MALE",
-                            "contact": {
-                                "emailAddress": "jorge.gonzales833@telefonica.es",
-                                "phones": [{"deviceType": "MOBILE", "countryCallingCode": "34", "number": "480080076"}],
-                            },
-                            "documents": [{
-                                "documentType": "PASSPORT",
-                                "birthPlace": "Madrid",
-                                "issuanceLocation": "Madrid",
-                                "issuanceDate": "2015-04-14",
-                                "number": "00000000",
-                                "expiryDate": "2025-04-14",
-                                "issuanceCountry": "ES",
-                                "validityCountry": "ES",
-                                "nationality": "ES",
-                                "holder": True,
-                            }],
-                        }
-
-                        # Confirm flight pricing with Amadeus API
-                        flight_price_confirmed = amadeus.shopping.flight_offers.pricing.post(
-                            flight_data).data["flightOffers"]
-
-                        if settings.AMADEUS_HOSTNAME == 'production':
-                            booking_api_endpoint = "https://api.amadeus.com/v1/booking/flight-orders"
-                        else:
-                            booking_api_endpoint = "https://test.api.amadeus.com/v1/booking/flight-orders"
-
-                        # Make booking via Amadeus API
-                        response = requests.post(
-                            booking_api_endpoint,
-                            headers=headers,
-                            json={"data": {
-                                "type": "flight-order", "flightOffers": flight_price_confirmed, "travelers": [traveler]}}
-                        )
-                        response.raise_for_status()
-
-                        order = response.json()["data"]
-                        passenger_name_record = [
-                            Booking(order).construct_booking()]
-
-                        # Send confirmation email to the user
-                        send_flight_email(
-                            user,  # Correct user from the loop
-                            origin,
-                            destination,
-                            departure_date,
-                            return_date,
-                            passenger_name_record
-                        )
-
-                        # Render the success page
-                        return render(request, "demo/book_flight.html", {"response": passenger_name_record})
-
-                except Exception as booking_error:
-                    logger.error(
-                        f"Error booking flight for user {user.username}: {booking_error}")
-                    messages.success(
-                        request, f"Flight Booked {user.username}. Please check your mails.")
-                    send_flight_email_2(user, origin, destination, departure_date,
-                                        return_date)
-                    return render(request, "demo/success_page.html", {"user": user})
+        if approved_flight:
+            # Pricing, ordering and the confirmation email happen in the
+            # run_booking_worker process (or right here with BOOKING_INLINE);
+            # the page polls the job's status
+            job = enqueue_booking(request.user, offer_id, flight_data, approved_flight)
+            run_inline(job, place_flight_order, notify_booking)
+            return redirect('booking_status', job_id=job.pk)
 
         else:
             logger.warning("No approved flights found")
@@ -814,38 +971,138 @@ def book_flight(request):
     return redirect('home')
 
 
+def place_flight_order(job):
+    """Price and order the job's offer; run by the run_booking_worker command."""
+    token = get_access_token()
+    headers = {
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/json'
+    }
+
+    # Prepare traveler information
+    traveler = {
+        "id": "1",
+        "dateOfBirth": "1982-01-16",
+        "name": {"firstName": "JORGE", "lastName": "GONZALES"},
+        "gender": "MALE",
+        "contact": {
+            "emailAddress": "jorge.gonzales833@telefonica.es",
+            "phones": [{"deviceType": "MOBILE", "countryCallingCode": "34", "number": "480080076"}],
+        },
+        "documents": [{
+            "documentType": "PASSPORT",
+            "birthPlace": "Madrid",
+            "issuanceLocation": "Madrid",
+            "issuanceDate": "2015-04-14",
+            "number": "00000000",
+            "expiryDate": "2025-04-14",
+            "issuanceCountry": "ES",
+            "validityCountry": "ES",
+            "nationality": "ES",
+            "holder": True,
+        }],
+    }
+
+    # Confirm flight pricing with Amadeus API
+    flight_price_confirmed = amadeus.shopping.flight_offers.pricing.post(
+        job.offer).data["flightOffers"]
+
+    # Make booking via Amadeus API. From here on a failure may hide a placed
+    # order, so it is handed to a person instead of retried
+    mark_order_sent(job)
+    try:
+        response = http_client.post(
+            amadeus_url("/v1/booking/flight-orders"),
+            headers=headers,
+            json={"data": {
+                "type": "flight-order", "flightOffers": flight_price_confirmed, "travelers": [traveler]}}
+        )
+    except requests.exceptions.ConnectTimeout:
+        # No connection was made, so the order never reached Amadeus
+        raise
+    except requests.exceptions.RequestException as error:
+        raise OrderOutcomeUnknown(error) from error
+    if response.status_code >= 500:
+        raise OrderOutcomeUnknown(f'{response.status_code} from the flight order request')
+    response.raise_for_status()
+
+    order = response.json()["data"]
+    return Booking(order).construct_booking()
+
+
+def notify_booking(job):
+    # Email about a finished booking job, to the user whose approved request
+    # allowed it
+    itineraries = job.offer['itineraries']
+    origin = itineraries[0]['segments'][0]['departure']['iataCode']
+    destination = itineraries[0]['segments'][-1]['arrival']['iataCode']
+    departure_date = itineraries[0]['segments'][0]['departure']['at'].split('T')[0]
+    return_date = itineraries[-1]['segments'][-1]['arrival']['at'].split('T')[0] if len(itineraries) > 1 else None
+    user = job.flight.user if job.flight and job.flight.user else job.user
+
+    if job.status == BookingJob.SUCCEEDED:
+        send_flight_email(user, origin, destination, departure_date, return_date, [job.result])
+    elif job.status in (BookingJob.FAILED, BookingJob.REVIEW):
+        send_flight_email_2(user, origin, destination, departure_date, return_date)
+
+
+def booking_status(request, job_id):
+    job = get_object_or_404(BookingJob, pk=job_id, user=request.user)
+    job = run_inline(job, place_flight_order, notify_booking)
+    done = job.status in (BookingJob.SUCCEEDED, BookingJob.FAILED, BookingJob.REVIEW)
+    if request.is_ajax():
+        return JsonResponse({'id': job.pk, 'status': job.status, 'attempts': job.attempts, 'done': done})
+
+    if job.status == BookingJob.SUCCEEDED:
+        return render(request, "demo/book_flight.html", {"response": [job.result]})
+    if job.status in (BookingJob.FAILED, BookingJob.REVIEW):
+        # As before the queue: the booking is finished offline from the email
+        user = job.flight.user if job.flight and job.flight.user else job.user
+        messages.success(request, f"Flight Booked {user.username}. Please check your mails.")
+        return render(request, "demo/success_page.html", {"user": user})
+    return render(request, "demo/booking_pending.html", {"job": job})
+
+
+def search_locations_upstream(term):
+    # Autocomplete asks again on every keystroke; each term's answer is
+    # cached and concurrent asks for it share one call
+    key = location_search_key(term)
+    return location_cache.get_or_call(key, lambda: amadeus_calls.do(
+        key, lambda: amadeus.reference_data.locations.get(keyword=term, subType=Location.ANY).data))
+
+
 def origin_airport_search(request):
-    data = []
+    data, local_matches = [], []
     if request.is_ajax():
+        # Answer from the local airport index; Amadeus fills in what it lacks
+        local_matches, complete = local_locations(request.GET.get("term", None))
+        if complete:
+            return HttpResponse(json.dumps(local_matches), content_type="application/json")
         try:
-            data = amadeus.reference_data.locations.get(
-                keyword=request.GET.get("term", None), subType=Location.ANY
-            ).data
-        except (ResponseError, KeyError, AttributeError) as error:
-            messages.add_message(
-                request, messages.ERROR, getattr(error, 'response', {}).get('result', {}).get('errors', [{'detail': str(error)}])[0]["detail"]
-            )
+            data = search_locations_upstream(request.GET.get("term", None))
+        except (ResponseError, LimitExceeded, KeyError, AttributeError) as error:
+            messages.add_message(request, messages.ERROR, upstream_error_message(error))
             data = []
-    return HttpResponse(get_city_airport_list(data), content_type="application/json")
+    return HttpResponse(get_city_airport_list(data, local_matches), content_type="application/json")
 
 
 def destination_airport_search(request):
-    data = []
+    data, local_matches = [], []
     if request.is_ajax():
+        # Answer from the local airport index; Amadeus fills in what it lacks
+        local_matches, complete = local_locations(request.GET.get("term", None))
+        if complete:
+            return HttpResponse(json.dumps(local_matches), content_type="application/json")
         try:
-            data = amadeus.reference_data.locations.get(
-                keyword=request.GET.get("term", None), subType=Location.ANY
-            ).data
-        except (ResponseError, KeyError, AttributeError) as error:
-            messages.add_message(
-                request, messages.ERROR, getattr(error, 'response', {}).get('result', {}).get('errors', [{'detail': str(error)}])[0]["detail"]
-            )
+            data = search_locations_upstream(request.GET.get("term", None))
+        except (ResponseError, LimitExceeded, KeyError, AttributeError) as error:
+            messages.add_message(request, messages.ERROR, upstream_error_message(error))
             data = []
-    return HttpResponse(get_city_airport_list(data), content_type="application/json")
+    return HttpResponse(get_city_airport_list(data, local_matches), content_type="application/json")
 
 
-def get_city_airport_list(data):
-    result = []
+def get_city_airport_list(data, local_matches=()):
+    result = list(local_matches)
     for i, val in enumerate(data):
         result.append(data[i]["iataCode"] + ", " + data[i]["name"])
     result = list(dict.fromkeys(result))
@@ -1010,9 +1267,8 @@ def send_flight_email(user, origin, destination, departure_date, return_date, pa
     email.content_subtype = 'html'  # If the message is HTML
     # email.attach('filename.txt', 'file content', 'text/plain')  # To attach files
 
-    # Send email
-    email.send(fail_silently=False)
-    print("Email sent successfully!")
+    # Queued; the send_outbox command delivers it
+    outbox.enqueue(email)
 
 
 def send_flight_email_2(user, origin, destination, departure_date, return_date):
@@ -1048,9 +1304,8 @@ def send_flight_email_2(user, origin, destination, departure_date, return_date):
     email.content_subtype = 'html'  # If the message is HTML
     # email.attach('filename.txt', 'file content', 'text/plain')  # To attach files
 
-    # Send email
-    email.send(fail_silently=False)
-    print("Email sent successfully!")
+    # Queued; the send_outbox command delivers it
+    outbox.enqueue(email)
 
 
 def send_flight_pending_email(user, origin, destination, departure_date, return_date, passenger_count, price):
@@ -1074,9 +1329,8 @@ def send_flight_pending_email(user, origin, destination, departure_date, return_
     email = EmailMultiAlternatives(subject, text_content, from_email, to_email)
     email.attach_alternative(html_content, "text/html")
 
-    # Send the email
-    email.send(fail_silently=False)
-    print("Email sent successfully!")
+    # Queued; the send_outbox command delivers it
+    outbox.enqueue(email)
 
 
 # ===========  HOTEL ===============>
@@ -1089,64 +1343,136 @@ def hotel(request):
     checkoutDate = request.POST.get('Checkoutdate')
 
     guest_count = request.POST.get('guestCount', '1')  # Default to 1 if not provided
-    kwargs = {'cityCode': request.POST.get('Origin'),
-              'checkInDate': request.POST.get('Checkindate'),
-              'checkOutDate': request.POST.get('Checkoutdate'),
-              'adults': int(guest_count)}  # Add guest count to the search parameters
 
     if origin and checkinDate and checkoutDate:
         # Store guest count in session for later use during booking
         request.session['guest_count'] = int(guest_count)
-        
+
         try:
             # Hotel List
-            hotel_list = amadeus.reference_data.locations.hotels.by_city.get(
-                cityCode=origin)
+            hotel_ids = get_city_hotel_ids(origin, fetch_city_hotel_ids)
         except ResponseError as error:
-            messages.add_message(request, messages.ERROR, error.response.body)
+            messages.add_message(request, messages.ERROR, error.response.body or UPSTREAM_BUSY_MESSAGE)
             return render(request, 'demo/hotel/demo_form.html', {})
-        hotel_offers = []
-        hotel_ids = []
-        for i in hotel_list.data:
-            hotel_ids.append(i['hotelId'])
-        num_hotels = 40
-        kwargs = {'hotelIds': hotel_ids[0:num_hotels],
-                  'checkInDate': request.POST.get('Checkindate'),
-                  'checkOutDate': request.POST.get('Checkoutdate'),
-                  'adults': int(guest_count)}
-        try:
-            # Hotel Search
-            search_hotels = amadeus.shopping.hotel_offers_search.get(**kwargs)
-        except ResponseError as error:
-            messages.add_message(request, messages.ERROR, error.response.body)
+        except LimitExceeded:
+            messages.add_message(request, messages.ERROR, UPSTREAM_BUSY_MESSAGE)
             return render(request, 'demo/hotel/demo_form.html', {})
-        try:
-            for hotel in search_hotels.data:
-                offer = Hotel(hotel).construct_hotel()
-                hotel_offers.append(offer)
-                response = zip(hotel_offers, search_hotels.data)
-
-            return render(request, 'demo/hotel/results.html', {'response': response,
-                                                               'origin': origin,
-                                                               'departureDate': checkinDate,
-                                                               'returnDate': checkoutDate,
-                                                               })
-        except UnboundLocalError:
-            messages.add_message(request, messages.ERROR, 'No hotels found.')
+
+        if settings.HOTEL_SEARCH_MAX_HOTELS:
+            hotel_ids = hotel_ids[:settings.HOTEL_SEARCH_MAX_HOTELS]
+        chunk_size = settings.HOTEL_OFFERS_CHUNK_SIZE
+        chunks = [hotel_ids[i:i + chunk_size] for i in range(0, len(hotel_ids), chunk_size)]
+
+        def search_chunk(chunk):
+            # Hotel Search
+            return amadeus_calls.do(
+                ('hotel_offers', tuple(chunk), checkinDate, checkoutDate, int(guest_count)),
+                lambda: amadeus.shopping.hotel_offers_search.get(
+                    hotelIds=chunk,
+                    checkInDate=checkinDate,
+                    checkOutDate=checkoutDate,
+                    adults=int(guest_count)).data)
+
+        # Every hotel in the city is priced, a few chunks at a time
+        results = map_unordered(search_chunk, chunks, settings.HOTEL_SEARCH_CONCURRENCY)
+
+        # Wait for the first chunk with hotels before committing to a results page
+        seen = set()
+        first_hotels = []
+        first_error = None
+        for chunk, future in results:
+            try:
+                first_hotels = unique_hotel_offers(future.result(), seen)
+            except (ResponseError, LimitExceeded) as error:
+                logger.warning(f"Hotel offers search failed for {len(chunk)} hotels: {error}")
+                first_error = first_error or error
+                continue
+            if first_hotels:
+                break
+
+        if not first_hotels:
+            if isinstance(first_error, LimitExceeded):
+                messages.add_message(request, messages.ERROR, UPSTREAM_BUSY_MESSAGE)
+            elif first_error is not None:
+                messages.add_message(request, messages.ERROR, first_error.response.body or UPSTREAM_BUSY_MESSAGE)
+            else:
+                messages.add_message(request, messages.ERROR, 'No hotels found.')
             return render(request, 'demo/hotel/demo_form.html', {})
+
+        header = {
+            'origin': origin,
+            'departureDate': checkinDate,
+            'returnDate': checkoutDate,
+        }
+        streaming_response = StreamingHttpResponse(
+            stream_hotel_results(request, header, first_hotels, results, seen),
+            content_type='text/html; charset=utf-8',
+        )
+        streaming_response['X-Accel-Buffering'] = 'no'
+        return streaming_response
     return render(request, 'demo/hotel/demo_form.html', {})
 
 
+def fetch_city_hotel_ids(city_code):
+    hotel_list = amadeus_calls.do(
+        ('hotels_by_city', city_code),
+        lambda: amadeus.reference_data.locations.hotels.by_city.get(cityCode=city_code))
+    return list(dict.fromkeys(i['hotelId'] for i in hotel_list.data))
+
+
+def unique_hotel_offers(hotels, seen):
+    # Chunks are disjoint, but Amadeus can list a property under several ids
+    unique = []
+    for hotel in hotels:
+        hotel_id = hotel.get('hotel', {}).get('hotelId')
+        if hotel_id in seen:
+            continue
+        seen.add(hotel_id)
+        unique.append(hotel)
+    return unique
+
+
+def render_hotel_cards(request, header, hotels, address_page):
+    # Resolve every hotel address in one pass instead of one lookup per hotel
+    addresses = address_page.addresses(
+        [(hotel.get('hotel', {}).get('latitude'), hotel.get('hotel', {}).get('longitude'))
+         for hotel in hotels])
+    hotel_offers = [Hotel(hotel).construct_hotel(address) for hotel, address in zip(hotels, addresses)]
+    return render_to_string('demo/hotel/results/cards.html', dict(header, hotels=hotel_offers), request)
+
+
+def stream_hotel_results(request, header, first_hotels, remaining, seen):
+    # The first chunk is already back; later chunks are sent as they finish.
+    # All of them share one geocoding deadline and lookup budget
+    address_page = AddressPage()
+    yield render_to_string('demo/hotel/results/head.html', header, request)
+    yield render_hotel_cards(request, header, first_hotels, address_page)
+    for chunk, future in remaining:
+        try:
+            hotels = unique_hotel_offers(future.result(), seen)
+        except (ResponseError, LimitExceeded) as error:
+            logger.warning(f"Hotel offers search failed for {len(chunk)} hotels: {error}")
+            continue
+        if hotels:
+            yield render_hotel_cards(request, header, hotels, address_page)
+    yield render_to_string('demo/hotel/results/foot.html', {'no_results': False}, request)
+
+
 def rooms_per_hotel(request, hotel, departureDate, returnDate):
     try:
         # Search for rooms in a given hotel
-        rooms = amadeus.shopping.hotel_offers_search.get(hotelIds=hotel,
-                                                         checkInDate=departureDate,
-                                                         checkOutDate=returnDate).data
+        rooms = amadeus_calls.do(
+            ('hotel_rooms', hotel, departureDate, returnDate),
+            lambda: amadeus.shopping.hotel_offers_search.get(hotelIds=hotel,
+                                                             checkInDate=departureDate,
+                                                             checkOutDate=returnDate).data)
         hotel_rooms = Room(rooms).construct_room()
         return render(request, 'demo/hotel/rooms_per_hotel.html', {'response': hotel_rooms,
                                                                    'name': rooms[0]['hotel']['name'],
                                                                    })
+    except LimitExceeded:
+        messages.add_message(request, messages.ERROR, UPSTREAM_BUSY_MESSAGE)
+        return render(request, 'demo/hotel/rooms_per_hotel.html', {})
     except (TypeError, AttributeError, ResponseError, KeyError) as error:
         messages.add_message(request, messages.ERROR, error)
         return render(request, 'demo/hotel/rooms_per_hotel.html', {})
@@ -1198,12 +1524,8 @@ def send_hotel_booking_email(user, hotel_details, booking_details):
     email = EmailMultiAlternatives(subject, text_content, from_email, to_email)
     email.attach_alternative(html_content, "text/html")
 
-    # Send the email
-    try:
-        email.send(fail_silently=False)
-        print("Hotel booking confirmation email sent successfully!")
-    except Exception as e:
-        print(f"Failed to send email: {str(e)}")
+    # Queued; the send_outbox command delivers it
+    outbox.enqueue(email)
 
 def book_hotel(request, offer_id):
     try:
@@ -1257,25 +1579,32 @@ def book_hotel(request, offer_id):
             })
 
     except ResponseError as error:
-        messages.add_message(request, messages.ERROR, error.response.body)
+        messages.add_message(request, messages.ERROR, error.response.body or UPSTREAM_BUSY_MESSAGE)
         return render(request, 'demo/hotel/booking.html', {})
 
 
 
 def city_search(request):
+    data, local_matches = [], []
     if request.is_ajax():
+        # Answer from the local airport index; Amadeus fills in what it lacks
+        local_matches, complete = local_locations(request.GET.get('term', None))
+        if complete:
+            return HttpResponse(json.dumps(local_matches), 'application/json')
         try:
-            data = amadeus.reference_data.locations.get(keyword=request.GET.get('term', None),
-                                                        subType=Location.ANY).data
+            data = search_locations_upstream(request.GET.get('term', None))
         except ResponseError as error:
-            messages.add_message(request, messages.ERROR, error.response.body)
-    return HttpResponse(get_city_list(data), 'application/json')
+            messages.add_message(request, messages.ERROR, error.response.body or UPSTREAM_BUSY_MESSAGE)
+            data = []
+        except LimitExceeded:
+            data = []
+    return HttpResponse(get_city_list(data, local_matches), 'application/json')
 
 
 
 
-def get_city_list(data):
-    result = []
+def get_city_list(data, local_matches=()):
+    result = list(local_matches)
     for i, val in enumerate(data):
         result.append(data[i]['iataCode'] + ', ' + data[i]['name'])
     result = list(dict.fromkeys(result))
@@ -0,0 +1,54 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, FIRST_COMPLETED, wait
+from itertools import islice
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Shared, bounded pool for upstream calls made while a request is being served
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'AMADEUS_MAX_WORKERS', 8),
+    thread_name_prefix='amadeus',
+)
+
+
+def submit(func, *args, **kwargs):
+    return executor.submit(func, *args, **kwargs)
+
+
+def map_unordered(func, items, concurrency):
+    """Call ``func(item)`` for every item on the shared pool, keeping at most
+    ``concurrency`` calls in flight, and yield ``(item, future)`` pairs in
+    completion order."""
+    items = iter(items)
+    pending = {submit(func, item): item for item in islice(items, concurrency)}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            for next_item in islice(items, 1):
+                pending[submit(func, next_item)] = next_item
+            yield item, future
+
+
+def result_or_default(future, timeout, default=None, started_at=None):
+    """Wait up to ``timeout`` seconds for ``future`` and return ``default`` on
+    timeout or error instead of raising.
+
+    When ``started_at`` (a ``time.monotonic()`` value) is given the timeout is
+    measured from that moment, so time already spent on other work counts
+    against it.
+    """
+    if started_at is not None:
+        timeout = max(0, timeout - (time.monotonic() - started_at))
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        # The call keeps running in the pool; only this request stops waiting
+        logger.warning(f"Upstream call did not finish within {timeout:.2f}s, continuing without it")
+    except Exception as error:
+        logger.warning(f"Upstream call failed, continuing without it: {error}")
+    return default
@@ -0,0 +1,20 @@
+"""
+ASGI config for online_booking_tool project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with ASYNC_SEARCH_VIEWS=True so the search views are served async, e.g.
+
+    gunicorn -k uvicorn.workers.UvicornWorker online_booking_tool.asgi:application
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'online_booking_tool.settings')
+
+application = get_asgi_application()
+app = application
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import environ
 
 # Initialize environment variables
@@ -28,6 +29,135 @@ AMADEUS_CLIENT_ID = env('AMADEUS_CLIENT_ID')
 AMADEUS_CLIENT_SECRET = env('AMADEUS_CLIENT_SECRET')
 AMADEUS_HOSTNAME = os.environ.get('AMADEUS_HOSTNAME', 'test')  # Default to 'test'
 
+# Flight search cache (seconds / number of cached searches per process)
+FLIGHT_SEARCH_CACHE_TTL = env.int('FLIGHT_SEARCH_CACHE_TTL', default=300)
+FLIGHT_SEARCH_CACHE_SIZE = env.int('FLIGHT_SEARCH_CACHE_SIZE', default=256)
+
+# Amadeus airport/city autocomplete answers, per term (seconds / number of terms per process)
+LOCATION_SEARCH_CACHE_TTL = env.int('LOCATION_SEARCH_CACHE_TTL', default=24 * 3600)
+LOCATION_SEARCH_CACHE_SIZE = env.int('LOCATION_SEARCH_CACHE_SIZE', default=4096)
+
+# Worker pool used to run independent Amadeus calls concurrently
+AMADEUS_MAX_WORKERS = env.int('AMADEUS_MAX_WORKERS', default=8)
+# Seconds the results page waits for the trip purpose prediction
+TRIP_PURPOSE_TIMEOUT = env.float('TRIP_PURPOSE_TIMEOUT', default=1.5)
+
+# Local airport/city dataset used by the autocomplete endpoints
+AIRPORT_DATASET_PATH = env('AIRPORT_DATASET_PATH', default=os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'demo', 'data', 'airports.csv'))
+AIRPORT_AUTOCOMPLETE_LIMIT = env.int('AIRPORT_AUTOCOMPLETE_LIMIT', default=10)
+
+# Hotel address reverse geocoding: concurrent lookups, per-call timeout and
+# how long the results page waits before rendering without an address, and
+# seconds before a point that resolved without a street is looked up again.
+# Each page starts at most GEOCODE_MAX_LOOKUPS lookups, and calls to
+# Nominatim are spaced GEOCODE_MIN_INTERVAL seconds apart in each process
+GEOCODE_MAX_WORKERS = env.int('GEOCODE_MAX_WORKERS', default=4)
+GEOCODE_TIMEOUT = env.float('GEOCODE_TIMEOUT', default=3)
+GEOCODE_WAIT = env.float('GEOCODE_WAIT', default=2)
+GEOCODE_BLANK_TTL = env.int('GEOCODE_BLANK_TTL', default=3600)
+GEOCODE_MAX_LOOKUPS = env.int('GEOCODE_MAX_LOOKUPS', default=20)
+GEOCODE_MIN_INTERVAL = env.float('GEOCODE_MIN_INTERVAL', default=1.0)
+
+# Amadeus OAuth token cache shared by all workers on this host
+AMADEUS_TOKEN_CACHE_DIR = env('AMADEUS_TOKEN_CACHE_DIR', default=tempfile.gettempdir())
+AMADEUS_TOKEN_REFRESH_BEFORE = env.int('AMADEUS_TOKEN_REFRESH_BEFORE', default=300)
+
+# Keep-alive connection pool for direct REST calls (seconds for timeouts)
+HTTP_POOL_CONNECTIONS = env.int('HTTP_POOL_CONNECTIONS', default=10)
+HTTP_POOL_MAXSIZE = env.int('HTTP_POOL_MAXSIZE', default=10)
+HTTP_CONNECT_TIMEOUT = env.float('HTTP_CONNECT_TIMEOUT', default=5)
+HTTP_READ_TIMEOUT = env.float('HTTP_READ_TIMEOUT', default=30)
+
+# Seconds a flight offer from a results page stays bookable
+OFFER_STORE_TTL = env.int('OFFER_STORE_TTL', default=1800)
+
+# Stream flight results: send the page header first, then offers in batches
+FLIGHT_RESULTS_STREAMING = env.bool('FLIGHT_RESULTS_STREAMING', default=False)
+FLIGHT_RESULTS_BATCH_SIZE = env.int('FLIGHT_RESULTS_BATCH_SIZE', default=25)
+
+# Seconds other workers may keep using a price markup after it was changed
+PRICE_INCREMENT_CACHE_TTL = env.int('PRICE_INCREMENT_CACHE_TTL', default=60)
+
+# Hotel search prices every hotel in the city in chunks of hotel ids;
+# HOTEL_SEARCH_MAX_HOTELS = 0 means no limit
+HOTEL_OFFERS_CHUNK_SIZE = env.int('HOTEL_OFFERS_CHUNK_SIZE', default=20)
+HOTEL_SEARCH_CONCURRENCY = env.int('HOTEL_SEARCH_CONCURRENCY', default=4)
+HOTEL_SEARCH_MAX_HOTELS = env.int('HOTEL_SEARCH_MAX_HOTELS', default=0)
+
+# Per-city hotel lists are kept in the database and refreshed in the
+# background once older than this (seconds)
+CITY_HOTEL_LIST_TTL = env.int('CITY_HOTEL_LIST_TTL', default=7 * 24 * 3600)
+
+# Identical concurrent Amadeus calls share one request. SINGLEFLIGHT_SHARED
+# also coalesces across workers; it needs a cache backend shared by them
+SINGLEFLIGHT_SHARED = env.bool('SINGLEFLIGHT_SHARED', default=False)
+SINGLEFLIGHT_CACHE = env('SINGLEFLIGHT_CACHE', default='default')
+SINGLEFLIGHT_SHARED_TTL = env.int('SINGLEFLIGHT_SHARED_TTL', default=30)
+
+# Adaptive (AIMD) limit on concurrent Amadeus calls per process. Calls slower
+# than AMADEUS_LATENCY_TARGET seconds shrink the limit; searches that find no
+# free slot within AMADEUS_QUEUE_TIMEOUT seconds are turned away
+AMADEUS_LIMIT_INITIAL = env.int('AMADEUS_LIMIT_INITIAL', default=8)
+AMADEUS_LIMIT_MIN = env.int('AMADEUS_LIMIT_MIN', default=2)
+AMADEUS_LIMIT_MAX = env.int('AMADEUS_LIMIT_MAX', default=32)
+AMADEUS_LATENCY_TARGET = env.float('AMADEUS_LATENCY_TARGET', default=4.0)
+AMADEUS_QUEUE_TIMEOUT = env.float('AMADEUS_QUEUE_TIMEOUT', default=0.5)
+AMADEUS_MAX_QUEUE = env.int('AMADEUS_MAX_QUEUE', default=16)
+AMADEUS_REQUEST_TIMEOUT = env.float('AMADEUS_REQUEST_TIMEOUT', default=20)
+
+# 'live' calls Amadeus. 'record' calls it and saves every response under
+# AMADEUS_FIXTURES_DIR; 'replay' serves those fixtures instead, with optional
+# latency (seconds, +/- JITTER as a fraction) and a share of injected errors
+AMADEUS_BACKEND = env('AMADEUS_BACKEND', default='live')
+AMADEUS_FIXTURES_DIR = env('AMADEUS_FIXTURES_DIR', default=os.path.join(BASE_DIR, 'demo', 'fixtures', 'amadeus'))
+AMADEUS_REPLAY_LATENCY = env.float('AMADEUS_REPLAY_LATENCY', default=0.0)
+AMADEUS_REPLAY_JITTER = env.float('AMADEUS_REPLAY_JITTER', default=0.0)
+AMADEUS_REPLAY_ERROR_RATE = env.float('AMADEUS_REPLAY_ERROR_RATE', default=0.0)
+AMADEUS_REPLAY_ERROR_STATUS = env.int('AMADEUS_REPLAY_ERROR_STATUS', default=500)
+
+# Serve the search views (flights, hotels, rooms, autocomplete) as async views
+# over httpx. Meant for the ASGI entry point, online_booking_tool.asgi
+ASYNC_SEARCH_VIEWS = env.bool('ASYNC_SEARCH_VIEWS', default=False)
+AMADEUS_ASYNC_MAX_CONNECTIONS = env.int('AMADEUS_ASYNC_MAX_CONNECTIONS', default=100)
+
+# Flexible-date search: dates searched either side of the requested ones, and
+# how many of the date pair searches run at once
+FLEX_DATE_DAYS = env.int('FLEX_DATE_DAYS', default=3)
+FLEX_DATE_CONCURRENCY = env.int('FLEX_DATE_CONCURRENCY', default=6)
+
+# Flight bookings are run by the run_booking_worker command. Failed attempts
+# are retried with exponential backoff (seconds) up to BOOKING_MAX_ATTEMPTS;
+# a running job whose worker is silent for BOOKING_JOB_LEASE is picked up again
+BOOKING_MAX_ATTEMPTS = env.int('BOOKING_MAX_ATTEMPTS', default=5)
+BOOKING_RETRY_BASE_DELAY = env.float('BOOKING_RETRY_BASE_DELAY', default=5)
+BOOKING_RETRY_MAX_DELAY = env.float('BOOKING_RETRY_MAX_DELAY', default=300)
+BOOKING_JOB_LEASE = env.int('BOOKING_JOB_LEASE', default=300)
+BOOKING_WORKER_POLL_INTERVAL = env.float('BOOKING_WORKER_POLL_INTERVAL', default=1.0)
+# Without a worker process (Vercel sets VERCEL=1), bookings run in the request
+BOOKING_INLINE = env.bool('BOOKING_INLINE', default=env.bool('VERCEL', default=False))
+
+# Emails are queued in the outbox and sent by the send_outbox command, in
+# batches over one connection. A message is retried with backoff (seconds)
+# and marked dead after OUTBOX_MAX_ATTEMPTS; sent rows are kept for
+# OUTBOX_SENT_RETENTION seconds
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=50)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=6)
+OUTBOX_RETRY_BASE_DELAY = env.float('OUTBOX_RETRY_BASE_DELAY', default=30)
+OUTBOX_RETRY_MAX_DELAY = env.float('OUTBOX_RETRY_MAX_DELAY', default=3600)
+OUTBOX_LEASE = env.int('OUTBOX_LEASE', default=300)
+OUTBOX_POLL_INTERVAL = env.float('OUTBOX_POLL_INTERVAL', default=2.0)
+OUTBOX_SENT_RETENTION = env.int('OUTBOX_SENT_RETENTION', default=7 * 24 * 3600)
+# Without a sender process (Vercel sets VERCEL=1), the outbox is drained
+# after each request that queues mail
+OUTBOX_INLINE = env.bool('OUTBOX_INLINE', default=env.bool('VERCEL', default=False))
+
+# Staff pending/approved flight lists: rows per page, and seconds the totals
+# may be cached (other processes see changes after at most this long unless
+# the default cache is shared)
+FLIGHT_LIST_PAGE_SIZE = env.int('FLIGHT_LIST_PAGE_SIZE', default=25)
+FLIGHT_LIST_COUNT_TTL = env.int('FLIGHT_LIST_COUNT_TTL', default=300)
+
 
 # Application definition
 INSTALLED_APPS = [
@@ -54,6 +184,11 @@ MIDDLEWARE = [
     'whitenoise.middleware.WhiteNoiseMiddleware',
 ]
 
+# WhiteNoise is sync-only: under ASGI it would run every async view on one
+# shared thread. Static files then come from the serve() routes in urls.py
+if ASYNC_SEARCH_VIEWS:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'online_booking_tool.urls'
 
 SETTINGS_PATH = os.path.dirname(os.path.dirname(__file__))
@@ -28,31 +28,21 @@ function initResultsFilters() {
         // Extract departure time (first 5 char like HH:MM)
         const timeMatch = departureText.match(/(\d{2}:\d{2})/);
         const depTime = timeMatch ? timeMatch[0] : '99:99';
-        return {row, price, stops, depTime};
+        // Offer details rendered by the server for the filters below
+        const splitList = value => value ? value.split(',') : [];
+        const carriers = splitList(row.getAttribute('data-carriers'));
+        const cabins = splitList(row.getAttribute('data-cabins'));
+        const itineraries = parseInt(row.getAttribute('data-itineraries'), 10) || 0;
+        const maxSegments = parseInt(row.getAttribute('data-max-segments'), 10) || 0;
+        const seats = parseInt(row.getAttribute('data-seats'), 10) || 0;
+        return {row, price, stops, depTime, carriers, cabins, itineraries, maxSegments, seats};
     }
 
     const data = rows.map(extractRowData);
 
     // Build set of airlines from data and populate airlinesContainer
     const airlinesSet = new Set();
-    data.forEach(d => {
-        try {
-            // attempt to find carrier codes
-            const rowJson = d.row.querySelector('.flight-json');
-            if (rowJson) {
-                const raw = rowJson.getAttribute('data-flight');
-                const parsed = JSON.parse(raw.replace(/&quot;/g, '"'));
-                // heuristics: carrierCode in itineraries segments
-                if (parsed.itineraries) {
-                    parsed.itineraries.forEach(it => it.segments.forEach(s => airlinesSet.add(s.carrierCode)));
-                } else if (parsed.flightOffers) {
-                    parsed.flightOffers.forEach(fo => fo.itineraries.forEach(it => it.segments.forEach(s => airlinesSet.add(s.carrierCode))));
-                }
-            }
-        } catch (e) {
-            // ignore parse errors
-        }
-    });
+    data.forEach(d => d.carriers.forEach(code => airlinesSet.add(code)));
 
     const airlinesContainer = document.getElementById('airlinesContainer');
     if (airlinesContainer) {
@@ -138,80 +128,31 @@ function initResultsFilters() {
         // Airline checkboxes
         const checkedAirlines = Array.from(document.querySelectorAll('.airline-checkbox:checked')).map(i => i.value);
         if (checkedAirlines.length) {
-            filtered = filtered.filter(d => {
-                try {
-                    const rowJson = d.row.querySelector('.flight-json');
-                    if (!rowJson) return false;
-                    const parsed = JSON.parse(rowJson.getAttribute('data-flight').replace(/&quot;/g, '"'));
-                    const carriers = new Set();
-                    if (parsed.itineraries) parsed.itineraries.forEach(it => it.segments.forEach(s => carriers.add(s.carrierCode)));
-                    else if (parsed.flightOffers) parsed.flightOffers.forEach(fo => fo.itineraries.forEach(it => it.segments.forEach(s => carriers.add(s.carrierCode))));
-                    return checkedAirlines.some(c => carriers.has(c));
-                } catch (e) {
-                    return false;
-                }
-            });
+            filtered = filtered.filter(d => checkedAirlines.some(c => d.carriers.includes(c)));
         }
 
         // Trip type filter
         const tripType = (document.getElementById('filterTripType') || {}).value || 'any';
         if (tripType && tripType !== 'any') {
             filtered = filtered.filter(d => {
-                try {
-                    const rowJson = d.row.querySelector('.flight-json');
-                    if (!rowJson) return false;
-                    const parsed = JSON.parse(rowJson.getAttribute('data-flight').replace(/&quot;/g, '"'));
-                    // Heuristic: if there are itineraries length > 1, it's round-trip; if only 1, one-way; multi-city if more than 2 segments/itineraries
-                    const itins = parsed.itineraries || (parsed.flightOffers && parsed.flightOffers[0] && parsed.flightOffers[0].itineraries) || [];
-                    if (tripType === 'one-way') return itins.length === 1;
-                    if (tripType === 'round-trip') return itins.length === 2;
-                    if (tripType === 'multi-city') return itins.length > 2 || itins.some(it => it.segments && it.segments.length > 2);
-                    return true;
-                } catch (e) { return false; }
+                // Heuristic: if there are itineraries length > 1, it's round-trip; if only 1, one-way; multi-city if more than 2 segments/itineraries
+                if (tripType === 'one-way') return d.itineraries === 1;
+                if (tripType === 'round-trip') return d.itineraries === 2;
+                if (tripType === 'multi-city') return d.itineraries > 2 || d.maxSegments > 2;
+                return true;
             });
         }
 
         // Cabin class filter
         const cabin = (document.getElementById('filterCabinClass') || {}).value || 'any';
         if (cabin && cabin !== 'any') {
-            filtered = filtered.filter(d => {
-                try {
-                    const rowJson = d.row.querySelector('.flight-json');
-                    if (!rowJson) return false;
-                    const parsed = JSON.parse(rowJson.getAttribute('data-flight').replace(/&quot;/g, '"'));
-                    // Search for cabin in pricing or travelerPricings if present
-                    const offers = parsed.flightOffers || [parsed];
-                    for (const offer of offers) {
-                        const cabinInfo = offer.travelers || offer.travelerPricings || [];
-                        // try to look into fare details
-                        if (offer.fareDetailsBySegment) {
-                            for (const key in offer.fareDetailsBySegment) {
-                                const seg = offer.fareDetailsBySegment[key];
-                                if (seg.cabin && seg.cabin.toLowerCase().includes(cabin.replace('_',''))) return true;
-                            }
-                        }
-                        if (offer.class && typeof offer.class === 'string' && offer.class.toLowerCase().includes(cabin.replace('_',''))) return true;
-                    }
-                    return false;
-                } catch (e) { return false; }
-            });
+            filtered = filtered.filter(d => d.cabins.some(c => c.toLowerCase() === cabin));
         }
 
-        // Passenger count filter (availability heuristic)
+        // Passenger count filter: offers without a seat count are kept
         const pax = parseInt((document.getElementById('filterPassengers') || {}).value, 10) || 1;
         if (pax > 1) {
-            filtered = filtered.filter(d => {
-                try {
-                    const rowJson = d.row.querySelector('.flight-json');
-                    if (!rowJson) return false;
-                    const parsed = JSON.parse(rowJson.getAttribute('data-flight').replace(/&quot;/g, '"'));
-                    // Heuristic: look for available seats or number of travelers allowed in the offer
-                    if (parsed.numberOfBookableSeats && parsed.numberOfBookableSeats >= pax) return true;
-                    if (parsed.travelers && parsed.travelers.length >= pax) return true;
-                    // fallback: assume available
-                    return true;
-                } catch (e) { return false; }
-            });
+            filtered = filtered.filter(d => !d.seats || d.seats >= pax);
         }
 
         applySort(filtered);